@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Headless microbenchmarks for the game's local hot paths, compared against a stored baseline.
+
+Covers the work that happens on this machine rather than upstream: decoding and rescaling a scene
+(load_image_surface), per-frame draw_play/draw_result cost (direct and through the zoom/pan viewport),
+handle_click, prompt template formatting, JSON extraction from model responses, and the newest-file fallback
+scan over a directory with many generated files. Runs with the SDL dummy video driver; no network or API keys.
+
+Usage:
+  python bench_hotpaths.py [--only NAME ...] [--repeat N] [--baseline PATH] [--save-baseline] [--threshold R]
+                           [--noise-floor-us US]
+
+Each benchmark reports the median and the minimum time per call over --repeat timed batches. Comparisons use
+the minimum, which is the least disturbed by scheduling and cache noise. With a baseline file present, the
+report adds the ratio to the baseline and flags a regression when a benchmark is slower by more than threshold
+and by more than the noise floor in absolute terms; the latter keeps microsecond-scale benchmarks from tripping
+on jitter. The script then exits non-zero, so it can be used as a regression gate.
+
+No baseline is shipped: timings are machine-specific, so record one with --save-baseline on the machine that
+runs the comparison (bench_baseline.json is git-ignored).
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(HERE, "bench_baseline.json")
+FALLBACK_SCAN_FILES = 2000
+NOISE_FLOOR_US = 2.0
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+os.environ["KALLY_SESSION_FILE"] = ""  # never read or overwrite the player's session
+
+sys.path.insert(0, HERE)
+
+import pygame  # noqa: E402
+
+import game  # noqa: E402
+from nano_banana import ImageGenerator  # noqa: E402
+
+MODEL_RESPONSE = (
+    "Sure! I located the face in the crowd near the fountain.\n"
+    "```json\n"
+    '{"center": {"x": 412, "y": 877}, "confidence": 0.82, "notes": "partially occluded by a balloon"}\n'
+    "```\n"
+    "Let me know if you need anything else."
+)
+
+
+def _time_per_call(fn, repeat: int, min_batch_s: float = 0.05) -> list:
+    """Seconds per call for each of `repeat` batches; the batch size is calibrated to take at least min_batch_s."""
+    fn()  # warm up caches, lazy imports and pygame's first-use paths
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_batch_s or loops >= 1 << 20:
+            break
+        loops *= 2
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - started) / loops)
+    return samples
+
+
+class Fixtures:
+    """Temporary scene files, a headless Game and an ImageGenerator shared by the benchmarks."""
+
+    def __init__(self):
+        self.tmp = tempfile.mkdtemp(prefix="kally-bench-")
+        self.game = game.Game()
+        scene = pygame.Surface((game.BASE_W, game.BASE_H))
+        # Some structure so PNG decode is not trivially compressible
+        for y in range(0, game.BASE_H, 16):
+            for x in range(0, game.BASE_W, 16):
+                scene.fill(((x * 7) % 256, (y * 3) % 256, (x + y) % 256), pygame.Rect(x, y, 16, 16))
+        self.base_png = os.path.join(self.tmp, "scene_base.png")
+        pygame.image.save(scene, self.base_png)
+        # Models do not always honour the canvas size; this one takes the smoothscale path.
+        self.large_png = os.path.join(self.tmp, "scene_large.png")
+        pygame.image.save(pygame.transform.scale(scene, (1024, 1792)), self.large_png)
+
+        self.scan_dir = os.path.join(self.tmp, "generated")
+        os.mkdir(self.scan_dir)
+        for i in range(FALLBACK_SCAN_FILES):
+            name = f"ENTER_FILE_NAME_{i}.png" if i % 4 == 0 else f"other_{i}.txt"
+            with open(os.path.join(self.scan_dir, name), "wb") as f:
+                f.write(b"x")
+
+        self.generator = ImageGenerator(
+            400,
+            700,
+            style="cartoon",
+            scenery="A bustling marketplace plaza at dusk.",
+            world_settings="Medieval",
+        )
+
+    def show_scene(self, viewport: bool):
+        g = self.game
+        g.viewport_size = (game.SCREEN_W, game.SCREEN_H) if viewport else None
+        g.viewport = g.pyramid_builder = None
+        g.image_path = self.base_png
+        g.image_surface = None
+        g.target = (400, 700)
+        g.state = "play"
+        g.draw_play()
+        if viewport:
+            g.pyramid_builder._thread.join()
+            g.draw_play()  # fill the scaled-tile cache for the settled zoom
+            g.draw_play()
+
+    def close(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+
+def benchmarks(fx: Fixtures) -> dict:
+    """name -> (setup or None, callable). setup runs once before the callable is timed."""
+    g = fx.game
+
+    def click():
+        g.state = "play"
+        g.tolerance = game.TARGET_TOLERANCE_INITIAL
+        g.handle_click((410, 690))
+
+    return {
+        "load_image_surface_base": (None, lambda: game.load_image_surface(fx.base_png)),
+        "load_image_surface_rescale": (None, lambda: game.load_image_surface(fx.large_png)),
+        "draw_play": (lambda: fx.show_scene(viewport=False), g.draw_play),
+        "draw_result": (lambda: fx.show_scene(viewport=False), lambda: g.draw_result(success=False)),
+        "draw_play_viewport": (lambda: fx.show_scene(viewport=True), g.draw_play),
+        "draw_result_viewport": (lambda: fx.show_scene(viewport=True), lambda: g.draw_result(success=False)),
+        "handle_click": (None, click),
+        "format_initial_prompt": (None, fx.generator._initial_prompt),
+        "format_rework_prompt": (None, lambda: fx.generator._rework_prompt(ImageGenerator.HARDER_LEVEL, 120, 340)),
+        "parse_json_object": (None, lambda: ImageGenerator._parse_json_object(MODEL_RESPONSE)),
+        "newest_generated_file": (None, lambda: game.newest_generated_file(fx.scan_dir)),
+    }
+
+
+def _format_time(seconds: float) -> str:
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:9.2f} ms"
+    return f"{seconds * 1e6:9.1f} us"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="*", default=None, help="run only these benchmarks")
+    parser.add_argument("--repeat", type=int, default=7, help="timed batches per benchmark")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="flag results slower than baseline by this ratio")
+    parser.add_argument(
+        "--noise-floor-us",
+        type=float,
+        default=NOISE_FLOOR_US,
+        help="never flag slowdowns smaller than this many microseconds per call",
+    )
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+
+    fx = Fixtures()
+    results = {}
+    regressions = []
+    try:
+        print(f"{'benchmark':<28} {'median':>12} {'min':>12}  vs baseline")
+        for name, (setup, fn) in benchmarks(fx).items():
+            if args.only and name not in args.only:
+                continue
+            if setup is not None:
+                setup()
+            samples = _time_per_call(fn, args.repeat)
+            median, best = statistics.median(samples), min(samples)
+            results[name] = best
+            line = f"{name:<28} {_format_time(median):>12} {_format_time(best):>12}"
+            if name in baseline:
+                ratio = best / baseline[name]
+                line += f"  {ratio:5.2f}x"
+                if ratio > 1 + args.threshold and (best - baseline[name]) * 1e6 > args.noise_floor_us:
+                    line += "  REGRESSION"
+                    regressions.append(name)
+            else:
+                line += "      -"
+            print(line)
+    finally:
+        fx.close()
+        pygame.quit()
+
+    if args.save_baseline:
+        merged = dict(baseline, **results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": time.time(), "python": sys.version.split()[0], "results": merged}, f, indent=2)
+        print(f"\nbaseline written to {args.baseline}")
+    if regressions:
+        print(f"\nFAIL: {len(regressions)} benchmark(s) slower than baseline by more than {args.threshold:.0%}: "
+              + ", ".join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Startup-time report for the game: module import costs and time-to-first-frame.
+
+Runs `python -X importtime -c "import game"` to list the slowest imports, then launches game.py headless
+(SDL dummy video driver, STARTUP_BENCH=1) several times and reports the time until the first menu frame.
+
+Usage:
+  python bench_startup.py [--runs N] [--top N] [--max-ms MS]
+
+With --max-ms the script exits non-zero when the median time-to-first-frame exceeds the budget,
+so it can be used as a regression gate.
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIRST_FRAME_RE = re.compile(r"\[Startup\] first frame after (\d+) ms")
+
+
+def _headless_env() -> dict:
+    env = dict(os.environ)
+    env["SDL_VIDEODRIVER"] = "dummy"
+    env["SDL_AUDIODRIVER"] = "dummy"
+    env["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+    env["STARTUP_BENCH"] = "1"
+    return env
+
+
+def import_times(top: int):
+    """Return (total_us, [(cumulative_us, self_us, module), ...]) for `import game`, slowest first."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import game"],
+        cwd=HERE,
+        env=_headless_env(),
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), module.rstrip()))
+    total = next((r[0] for r in rows if r[2].strip() == "game"), 0)
+    rows.sort(reverse=True)
+    return total, rows[:top]
+
+
+def first_frame_ms() -> tuple[float, float | None]:
+    """Launch the game once; return (wall-clock ms until first frame, ms reported by the game)."""
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "game.py")],
+        cwd=HERE,
+        env=_headless_env(),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    reported = None
+    wall = None
+    for line in proc.stdout:
+        match = FIRST_FRAME_RE.search(line)
+        if match:
+            wall = (time.perf_counter() - started) * 1000
+            reported = float(match.group(1))
+            break
+    proc.wait(timeout=30)
+    if wall is None:
+        raise RuntimeError("game exited without presenting a frame")
+    return wall, reported
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="number of game launches to time")
+    parser.add_argument("--top", type=int, default=15, help="number of slowest imports to list")
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if median time-to-first-frame exceeds this")
+    args = parser.parse_args()
+
+    total, rows = import_times(args.top)
+    print(f"import game: {total / 1000:.1f} ms cumulative")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative, own, module in rows:
+        print(f"{cumulative / 1000:14.1f} {own / 1000:9.1f}  {module}")
+
+    walls, reported = [], []
+    for _ in range(args.runs):
+        wall, game_ms = first_frame_ms()
+        walls.append(wall)
+        if game_ms is not None:
+            reported.append(game_ms)
+    median = statistics.median(walls)
+    print()
+    print(f"time-to-first-frame over {args.runs} run(s): median {median:.0f} ms, min {min(walls):.0f} ms, max {max(walls):.0f} ms")
+    if reported:
+        print(f"  (in-process, from game.py import: median {statistics.median(reported):.0f} ms)")
+
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"FAIL: median {median:.0f} ms exceeds budget of {args.max_ms:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,24 +1,75 @@
 import os
 import sys
 import random
+import threading
+import time
+
+STARTUP_T0 = time.perf_counter()  # taken before pygame import; used for the time-to-first-frame report
+
 import pygame
 import traceback
 from typing import Optional, Tuple
 
-# We are not allowed to modify these modules; we import and use them as-is.
+from memory_budget import (
+    PINNED,
+    VALUE_IMAGE_BYTES,
+    VALUE_OVERLAY,
+    VALUE_PYRAMID,
+    VALUE_SCALED_TILES,
+    MemoryBudget,
+    MemoryDiagnostics,
+    surface_nbytes,
+)
+from model_router import default_router
+from profiler import Profiler
+from session import SESSION_SAVE_INTERVAL_S, load_session, save_session
+from viewport import PyramidBuilder, Viewport
+
+# Both modules import their heavy SDKs (google.genai, requests) lazily, so importing them here is cheap;
+# warm_up_sdks() loads the SDKs in the background once the menu is on screen.
 try:
-    from generate_prompt_json import generate_prompt
+    from generate_prompt_json import generate_prompt, synthesize_prompt, warm_up as warm_up_prompt
 except Exception:  # If import fails, we'll handle at runtime
-    generate_prompt = None  # type: ignore
+    generate_prompt = synthesize_prompt = warm_up_prompt = None  # type: ignore
 
 try:
-    from nano_banana import ImageGenerator
+    from nano_banana import CancelToken, GenerationAborted, HedgePolicy, ImageGenerator, warm_up as warm_up_images
 except Exception:
-    ImageGenerator = None  # type: ignore
+    CancelToken = GenerationAborted = HedgePolicy = ImageGenerator = warm_up_images = None  # type: ignore
 
 SCREEN_W, SCREEN_H = 1080, 720  # default menu/loading size; play mode resizes to image size
 BASE_W, BASE_H = 768, 1344  # base coordinate system for prompts/mapping
 TARGET_TOLERANCE_INITIAL = 25
+# Upper bound in seconds for a single image generation/detection call; 0 disables the deadline.
+GENERATION_TIMEOUT_S = float(os.getenv("GENERATION_TIMEOUT", "120"))
+# Ask the image model for the face box in the same call; detection becomes a fallback only.
+EMBED_TARGET = os.getenv("EMBED_TARGET", "").lower() in ("1", "true", "yes", "on")
+# Run generation in a separate worker process (see generation_worker.py); GENERATION_WORKER=0 keeps it in-process.
+GENERATION_WORKER = os.getenv("GENERATION_WORKER", "1").lower() not in ("0", "false", "no", "off")
+# Zoom/pan viewport for the scene: "1" always, "0" never, "auto" (default) only when the scene does not fit on
+# the display at 1:1.
+VIEWPORT_MODE = os.getenv("VIEWPORT", "auto").lower()
+ZOOM_STEP = 1.25  # zoom factor per mouse-wheel notch / +- key
+PAN_STEP = 80  # screen pixels per arrow key press
+# Start the sampling profiler and frame timer at launch (F9 toggles them at any time).
+PROFILE_AT_START = os.getenv("KALLY_PROFILE", "").lower() in ("1", "true", "yes", "on")
+PROFILE_INTERVAL_S = float(os.getenv("KALLY_PROFILE_INTERVAL_MS", "5")) / 1000
+# One budget for surfaces, caches and image bytes held by the UI process (see memory_budget.py).
+MEMORY_BUDGET_MB = float(os.getenv("KALLY_MEMORY_BUDGET_MB", "256"))
+# tracemalloc snapshots at every state transition
+MEMDIAG = os.getenv("KALLY_MEMDIAG", "").lower() in ("1", "true", "yes", "on")
+# Set by bench_startup.py: exit right after the first frame is presented.
+STARTUP_BENCH = os.getenv("STARTUP_BENCH", "").lower() in ("1", "true", "yes", "on")
+# Optional hedged image requests; one shared policy keeps latency history across rounds.
+IMAGE_HEDGING = os.getenv("IMAGE_HEDGING", "").lower() in ("1", "true", "yes", "on")
+HEDGE_POLICY = (
+    HedgePolicy(
+        percentile=float(os.getenv("IMAGE_HEDGE_PERCENTILE", "0.95")),
+        max_extra_ratio=float(os.getenv("IMAGE_HEDGE_MAX_EXTRA", "0.1")),
+    )
+    if IMAGE_HEDGING and HedgePolicy is not None
+    else None
+)
 BG_COLOR = (15, 15, 18)
 TEXT_COLOR = (235, 235, 235)
 ACCENT = (80, 180, 255)
@@ -37,20 +88,140 @@ def gen_coords(w: int, h: int) -> Tuple[int, int]:
     return random.randint(0, max(1, w) - 1), random.randint(0, max(1, h) - 1)
 
 
+class CircuitBreaker:
+    """
+    Per-upstream circuit breaker. Opens after failure_threshold consecutive failures/timeouts; while open, allow()
+    returns False so callers go straight to their offline fallback. After reset_timeout seconds a single probe is
+    let through (half-open) and its outcome closes or re-opens the breaker.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Let exactly one probe through; concurrent callers keep short-circuiting until it reports back.
+                self.state = self.HALF_OPEN
+                print(f"[Breaker] {self.name} half-open; probing")
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                print(f"[Breaker] {self.name} closed")
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_cancelled(self):
+        """The call was cancelled by us, which says nothing about the upstream."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                # Hand the probe back: opened_at is unchanged, so the next allow() probes again right away.
+                self.state = self.OPEN
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    print(f"[Breaker] {self.name} open after {self.failures} failure(s)")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+BREAKER_THRESHOLD = int(os.getenv("BREAKER_THRESHOLD", "3"))
+BREAKER_RESET_S = float(os.getenv("BREAKER_RESET", "30"))
+BREAKERS = {
+    name: CircuitBreaker(name, failure_threshold=BREAKER_THRESHOLD, reset_timeout=BREAKER_RESET_S)
+    for name in ("prompt", "image", "detection")
+}
+
+
+def record_outcome(breaker: CircuitBreaker, result) -> None:
+    # Cancellation is the caller's choice, not an upstream fault; it only returns an unfinished probe.
+    if GenerationAborted is not None and isinstance(result, GenerationAborted):
+        if result.timed_out:
+            breaker.record_failure()
+        else:
+            breaker.record_cancelled()
+    elif result:
+        breaker.record_success()
+    else:
+        breaker.record_failure()
+
+
+def warm_up_sdks() -> None:
+    # Runs on a daemon thread so SDK imports overlap with the player reading the menu.
+    def _warm():
+        for warm in (warm_up_prompt, warm_up_images):
+            if warm is None:
+                continue
+            try:
+                warm()
+            except Exception:
+                traceback.print_exc()
+
+    threading.Thread(target=_warm, name="sdk-warmup", daemon=True).start()
+
+
+def generation_deadline() -> Optional[float]:
+    if GENERATION_TIMEOUT_S <= 0:
+        return None
+    return time.monotonic() + GENERATION_TIMEOUT_S
+
+
 def try_generate_prompt(seed: Optional[int] = None) -> Optional[dict]:
     if generate_prompt is None:
         return None
+    mode = os.getenv("PROMPT_MODE", "remote")
+    if mode == "local":
+        return synthesize_prompt(seed)
+
+    def fallback() -> Optional[dict]:
+        # Only "auto" falls back to the local synthesizer; "remote" stays strict and the round uses its defaults.
+        return synthesize_prompt(seed) if mode == "auto" else None
+
+    breaker = BREAKERS["prompt"]
+    if not breaker.allow():
+        return fallback()
     try:
-        return generate_prompt(seed=seed)
+        # Always remote here, also for PROMPT_MODE=auto: the fallback happens below, after the breaker has seen
+        # the failure, instead of inside generate_prompt where it would look like a success.
+        result = generate_prompt(seed=seed, mode="remote")
     except Exception:
-        return None
+        breaker.record_failure()
+        return fallback()
+    breaker.record_success()
+    return result
 
 
 def try_generate_image(
-    prompt_json: Optional[dict], coords: Tuple[int, int], custom_image: Optional[str]
+    prompt_json: Optional[dict],
+    coords: Tuple[int, int],
+    custom_image: Optional[str],
+    cancel_token: Optional["CancelToken"] = None,
+    deadline: Optional[float] = None,
 ) -> Tuple[Optional[str], Optional[ImageGenerator]]:
     if ImageGenerator is None:
         return (None, None)
+    breaker = BREAKERS["image"]
+    if not breaker.allow():
+        print("[Round] image upstream unavailable; using offline fallback")
+        return (None, None)
     x, y = coords
     style = prompt_json.get("style") if prompt_json else None
     scenery = prompt_json.get("scenery") if prompt_json else None
@@ -79,8 +250,14 @@ def try_generate_image(
             crowd_density=(prompt_json.get("crowd_density") if prompt_json else None) or "high",
             color_palette=(prompt_json.get("color_palette") if prompt_json else None) or "vibrant",
             custom_image=custom_image,
+            hedge_policy=HEDGE_POLICY,
+            embed_target=EMBED_TARGET,
         )
-        ig.generate_initial()
+        result = ig.generate_initial(cancel_token=cancel_token, deadline=deadline)
+        record_outcome(breaker, result)
+        if isinstance(result, GenerationAborted):
+            print(f"[Round] image generation {result.reason}")
+            return (None, None)
         # nano_banana saves the first returned file path internally and returns it from _generate
         # We can't access it directly, but generate_initial returns None; however, during _generate it returns file path.
         # The class stores the last generated path in _current_level_image; try to read it.
@@ -89,20 +266,200 @@ def try_generate_image(
         if image_path and os.path.exists(image_path):
             return (image_path, ig)
         # Fallback: try to find the newest ENTER_FILE_NAME_* file
-        candidates = [
-            os.path.join(os.getcwd(), f)
-            for f in os.listdir(os.getcwd())
-            if f.startswith("ENTER_FILE_NAME_")
-        ]
-        if candidates:
-            candidates.sort(key=lambda p: os.path.getmtime(p), reverse=True)
-            return (candidates[0], ig)
+        newest = newest_generated_file()
+        if newest is not None:
+            return (newest, ig)
     except Exception:
         traceback.print_exc()
+        breaker.record_failure()
         return (None, None)
     return (None, None)
 
 
+def newest_generated_file(directory: Optional[str] = None) -> Optional[str]:
+    """Most recently modified ENTER_FILE_NAME_* file in directory (default: cwd), or None."""
+    directory = directory or os.getcwd()
+    newest, newest_mtime = None, None
+    # scandir reuses the directory listing's metadata, and a single max pass avoids sorting every file.
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.name.startswith("ENTER_FILE_NAME_"):
+                continue
+            try:
+                mtime = entry.stat().st_mtime
+            except OSError:
+                continue
+            if newest_mtime is None or mtime > newest_mtime:
+                newest, newest_mtime = entry.path, mtime
+    return newest
+
+
+def try_detect_face(
+    image_generator,
+    image_path: Optional[str],
+    custom_image: Optional[str],
+    cancel_token: Optional["CancelToken"] = None,
+) -> Optional[Tuple[int, int]]:
+    reported = getattr(image_generator, "reported_target", None)
+    if reported:
+        # The generation call already returned a plausible box; no second upstream call needed.
+        print(f"[Detect] using target reported with the image: {reported}")
+        return reported
+    if not (image_generator and custom_image and image_path):
+        return None
+    if not (os.path.exists(image_path) and os.path.exists(custom_image)):
+        return None
+    breaker = BREAKERS["detection"]
+    if not breaker.allow():
+        return None
+    try:
+        detected = image_generator.detect_face_center(
+            image_path, custom_image, cancel_token=cancel_token, deadline=generation_deadline()
+        )
+    except Exception:
+        traceback.print_exc()
+        breaker.record_failure()
+        return None
+    record_outcome(breaker, detected)
+    return detected or None
+
+
+def resolve_round(seed: int, custom_image: Optional[str], cancel_token: Optional["CancelToken"] = None):
+    """
+    Run one round end to end: prompt, image and face detection.
+    Returns (prompt_json, image_path, image_generator, target); used both in-process and by the generation worker.
+    """
+    default_router().reset_last()  # the routing line below covers this round's calls only
+    # Generate prompt JSON
+    prompt_json = try_generate_prompt(seed=seed)
+    # Generate coordinates in the base 768x1344 space to remain consistent with prompts
+    legacy_x, legacy_y = gen_coords(BASE_W, BASE_H)
+    target = (legacy_x, legacy_y)
+    print(f"[Round] seed={seed} | base_coords(768x1344)=({legacy_x}, {legacy_y})")
+    if HEDGE_POLICY is not None:
+        print(f"[Round] hedging {HEDGE_POLICY.metrics()}")
+    # Generate image via nano_banana using legacy coordinates
+    image_path, image_generator = try_generate_image(
+        prompt_json,
+        target,
+        custom_image,
+        cancel_token=cancel_token,
+        deadline=generation_deadline(),
+    )
+    # After image exists, attempt face localization to determine actual coordinates
+    if image_path and os.path.exists(image_path):
+        detected = try_detect_face(image_generator, image_path, custom_image, cancel_token=cancel_token)
+        if detected:
+            dx, dy = detected
+            # Since display surface is scaled to BASE (768x1344) in load_image_surface, dx,dy are already in that space
+            target = (dx, dy)
+            print(f"[Round] face center detected at BASE coords=({dx}, {dy})")
+        else:
+            # Legacy mapping fallback. The play surface is always rescaled to BASE, so the requested
+            # coordinates map 1:1; only the clamp matters.
+            try:
+                raw = pygame.image.load(image_path)
+                ow, oh = raw.get_width(), raw.get_height()
+                del raw
+            except Exception:
+                ow, oh = -1, -1
+            new_x = clamp(legacy_x, 0, BASE_W - 1)
+            new_y = clamp(legacy_y, 0, BASE_H - 1)
+            target = (new_x, new_y)
+            print(f"[Round] fallback mapping image_original_size=({ow}x{oh}), play_surface_size=({BASE_W}x{BASE_H}), final_target=({new_x}, {new_y})")
+        if image_generator is not None:
+            image_generator.set_level_target(target)
+    else:
+        # The fallback asset is also shown on the BASE canvas, so the random target is picked there.
+        target = gen_coords(BASE_W, BASE_H)
+        print(f"[Round] image generation failed; fallback target=({target[0]}, {target[1]}) on BASE {BASE_W}x{BASE_H}")
+    print(f"[Round] routing {default_router().describe_last()}")
+    return prompt_json, image_path, image_generator, target
+
+
+def resolve_adjust(
+    image_generator,
+    easier: bool,
+    custom_image: Optional[str],
+    cancel_token: Optional["CancelToken"] = None,
+) -> Tuple[str, Optional[str], Optional[Tuple[int, int]]]:
+    """
+    Rework the current level easier or harder and locate the face again.
+    Returns (status, image_path, target) where status is "ok", "aborted", "unavailable" or "failed".
+    """
+    breaker = BREAKERS["image"]
+    if not breaker.allow():
+        print("[Adjust] image upstream unavailable; keeping current level")
+        return ("unavailable", None, None)
+    default_router().reset_last()
+    # Pick new coordinates in base space (768x1344)
+    new_x, new_y = gen_coords(BASE_W, BASE_H)
+    try:
+        if easier:
+            print(f"[Adjust] make_easier to=({new_x}, {new_y})")
+            result = image_generator.make_easier(
+                new_x, new_y, cancel_token=cancel_token, deadline=generation_deadline()
+            )
+        else:
+            print(f"[Adjust] make_harder to=({new_x}, {new_y})")
+            result = image_generator.make_harder(
+                new_x, new_y, cancel_token=cancel_token, deadline=generation_deadline()
+            )
+    except Exception:
+        traceback.print_exc()
+        breaker.record_failure()
+        return ("failed", None, None)
+    record_outcome(breaker, result)
+    if isinstance(result, GenerationAborted):
+        print(f"[Adjust] rework {result.reason}; keeping current level")
+        return ("aborted", None, None)
+    if result is None:
+        print("[Adjust] rework returned no image; keeping current level")
+        return ("failed", None, None)
+    # After generation, read the latest generated file from the ImageGenerator instance
+    image_path = getattr(image_generator, "_current_level_image", None)
+    if not (image_path and os.path.exists(image_path)):
+        image_path = None
+    # Try to detect actual location after rework if possible
+    detected = try_detect_face(image_generator, image_path, custom_image, cancel_token=cancel_token)
+    print(f"[Adjust] routing {default_router().describe_last()}")
+    if detected:
+        print(f"[Adjust] face center detected at BASE coords={detected}")
+        target = detected
+    else:
+        # Fallback: assume the requested new coords
+        target = (new_x, new_y)
+    image_generator.set_level_target(target)
+    return ("ok", image_path, target)
+
+
+def resolve_goto(image_generator, index: int) -> Tuple[str, Optional[str], Optional[Tuple[int, int]]]:
+    """
+    Jump back to an earlier level of the generator's history; no model call is made.
+    Returns (status, image_path, target) like resolve_adjust; status is "unavailable" if the level was evicted.
+    """
+    image_path = image_generator.goto_level(index)
+    if image_path is None:
+        print(f"[Level] level {index} is no longer available")
+        return ("unavailable", None, None)
+    print(f"[Level] back to level {index}")
+    return ("ok", image_path, image_generator.level_target())
+
+
+def restore_generator(state: dict):
+    """Rebuild an ImageGenerator from a session snapshot with this process's hedging/target settings."""
+    if ImageGenerator is None:
+        return None
+    return ImageGenerator.from_state(state, hedge_policy=HEDGE_POLICY, embed_target=EMBED_TARGET)
+
+
+def level_position(image_generator) -> Tuple[Optional[int], Optional[int]]:
+    """(current level index, parent index) of a generator's history, or (None, None) without one."""
+    if image_generator is None or getattr(image_generator, "current_level", None) is None:
+        return (None, None)
+    return (image_generator.current_level, image_generator.parent_level())
+
+
 def load_image_surface(path: Optional[str]) -> pygame.Surface:
     # Load image; if size differs from BASE_WxBASE_H, rescale to ensure 1:1 coordinate mapping.
     def _load(p: str) -> pygame.Surface:
@@ -148,6 +505,8 @@ class Game:
     def __init__(self):
         pygame.init()
         pygame.display.set_caption("Find Wally - Nano Banana Edition")
+        # Desktop size is only reported before the first set_mode call.
+        self.viewport_size = self._pick_viewport_size(pygame.display.Info())
         self.screen = pygame.display.set_mode((SCREEN_W, SCREEN_H))
         self.clock = pygame.time.Clock()
         self.font = pygame.font.SysFont(None, 28)
@@ -156,6 +515,12 @@ class Game:
         self.just_loaded_at: Optional[int] = None  # ticks when image loaded in play
         self.debug_show_target: bool = os.getenv("DEBUG_SHOW_TARGET", "").lower() in ("1", "true", "yes", "on")
 
+        # Memory accounting; must exist before the first state assignment below.
+        self.memory = MemoryBudget(int(MEMORY_BUDGET_MB * 2**20))
+        self.memdiag = MemoryDiagnostics() if MEMDIAG else None
+        self.overlays = {}  # (size, rgba) -> translucent fill surface reused across frames
+        self.hud_label = None  # (text, rendered surface)
+
         # UI state
         self.state = "menu"  # menu -> loading -> play -> result
         self.custom_image_path: Optional[str] = None
@@ -166,8 +531,12 @@ class Game:
         self.btn_new_round = Button(pygame.Rect(50, 50, 200, 44), "New Round")
         self.btn_easier = Button(pygame.Rect(270, 50, 160, 44), "Easier")
         self.btn_harder = Button(pygame.Rect(440, 50, 160, 44), "Harder")
+        self.btn_back = Button(pygame.Rect(610, 50, 120, 44), "Back")
         self.image_generator: Optional[ImageGenerator] = None
         self.prompt_json_cache: Optional[dict] = None
+        # Position in the generator's level history; Back returns to level_parent without a model call.
+        self.level_index: Optional[int] = None
+        self.level_parent: Optional[int] = None
 
         # Game state
         self.target: Tuple[int, int] = (0, 0)
@@ -175,7 +544,73 @@ class Game:
         self.last_result: Optional[str] = None
         self.image_path: Optional[str] = None
         self.image_surface: Optional[pygame.Surface] = None
+        # Set while the scene is shown through the zoom/pan viewport (see VIEWPORT_MODE)
+        self.viewport: Optional[Viewport] = None
+        self.pyramid_builder: Optional[PyramidBuilder] = None
         self.round_seed: Optional[int] = None
+        # Cancelled on quit so in-flight generation calls return promptly instead of blocking shutdown. Only the
+        # worker's calls can be reached this way: in-process generation (GENERATION_WORKER=0) blocks the event
+        # loop, so QUIT is only seen after the call has returned (or hit GENERATION_TIMEOUT).
+        self.cancel_token = CancelToken() if CancelToken is not None else None
+
+        # Generation worker process; started after the first frame. None means generate in-process.
+        self.worker = None
+        self.pending_job: Optional[int] = None
+        self.pending_easier: Optional[bool] = None  # None for a new round, else the requested adjustment
+        self.return_state = "menu"  # where Esc during loading goes back to
+        self.loading_msg = "Generating…"
+
+        # Active profiling session (F9 / KALLY_PROFILE); None when off so the frame loop pays nothing.
+        self.profiler: Optional[Profiler] = None
+
+        # Saved session from the last run; the first Start Game resumes it instead of generating.
+        self.session: Optional[dict] = load_session()
+        self.generator_state: Optional[dict] = None  # latest generator snapshot reported by the worker
+        self.session_dirty = False
+        self.session_saved_at = 0.0
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    @state.setter
+    def state(self, value: str):
+        previous = getattr(self, "_state", None)
+        self._state = value
+        if self.memdiag is not None and value != previous:
+            self.memdiag.snapshot(f"{previous} -> {value}", self.memory)
+
+    def cached_overlay(self, size: Tuple[int, int], rgba: Tuple[int, int, int, int]) -> pygame.Surface:
+        key = (size, rgba)
+        surface = self.overlays.get(key)
+        evict = None
+        if surface is None:
+            surface = pygame.Surface(size, pygame.SRCALPHA)
+            surface.fill(rgba)
+            self.overlays[key] = surface
+            evict = lambda: self.overlays.pop(key, None)  # noqa: E731
+        self.memory.track("overlay", key, surface_nbytes(surface), VALUE_OVERLAY, evict=evict)
+        return surface
+
+    def _drop_pyramid(self):
+        # The viewport scales the visible part of the scene directly until the next scene builds a new pyramid.
+        self.pyramid_builder = None
+
+    def _drop_scaled_tiles(self):
+        if self.viewport is not None:
+            self.viewport.clear_cache()
+
+    def _release_generator_images(self):
+        if self.worker is not None:
+            self.worker.release_images()  # the worker owns the generator; its reply re-reports the size
+        elif self.image_generator is not None:
+            self.image_generator.release_cached_images()
+
+    def _track_generator_images(self, nbytes: int, releasable: bool = True):
+        # Level image copies live in the worker when it runs, else in self.image_generator; one entry either way.
+        # What is left right after a release cannot be released again, so it gets no evict callback until it grows.
+        evict = self._release_generator_images if releasable else None
+        self.memory.track("image_bytes", "generator", nbytes, VALUE_IMAGE_BYTES, evict=evict)
 
     def draw_menu(self):
         self.screen.fill(BG_COLOR)
@@ -189,6 +624,10 @@ class Game:
             "2) Start Game to generate a scene and hide the face.",
             "3) Click within ±25px of the hidden coords to win.",
         ]
+        if self.session is not None:
+            info_lines.append("   - Start Game resumes your last session.")
+        if self.viewport_size is not None:
+            info_lines.append("   - Mouse wheel or +/- zooms, right-drag or arrows pan, 0 resets the view.")
         for i, line in enumerate(info_lines):
             lbl = self.font.render(line, True, TEXT_COLOR)
             self.screen.blit(lbl, (50, 170 + i * 26))
@@ -209,29 +648,68 @@ class Game:
         self.screen.fill(BG_COLOR)
         lab = self.big_font.render(msg, True, TEXT_COLOR)
         self.screen.blit(lab, (50, 50))
+        if self.pending_job is not None:
+            hint = self.font.render("Esc to cancel", True, TEXT_COLOR)
+            self.screen.blit(hint, (50, 100))
+
+    @staticmethod
+    def _pick_viewport_size(info) -> Optional[Tuple[int, int]]:
+        """Window size for the zoom/pan viewport, or None to show the scene 1:1 in a window of its size."""
+        if VIEWPORT_MODE in ("0", "false", "no", "off"):
+            return None
+        desk_w, desk_h = getattr(info, "current_w", -1), getattr(info, "current_h", -1)
+        if desk_w <= 0 or desk_h <= 0:
+            # Unknown desktop (e.g. dummy video driver): only use the viewport when asked for explicitly.
+            return (SCREEN_W, SCREEN_H) if VIEWPORT_MODE in ("1", "true", "yes", "on") else None
+        # Leave room for window decorations and the task bar.
+        view = (min(BASE_W, int(desk_w * 0.9)), min(BASE_H, int(desk_h * 0.85)))
+        if VIEWPORT_MODE == "auto" and view == (BASE_W, BASE_H):
+            return None
+        return view
+
+    def _show_scene(self, surface: pygame.Surface):
+        self.image_surface = surface
+        self.memory.track("scene", "current", surface_nbytes(surface), PINNED)
+        self.memory.release_category("pyramid")
+        self.memory.release_category("tiles")
+        if self.worker is None and self.image_generator is not None:
+            self._track_generator_images(self.image_generator.cached_image_bytes())
+        # If image size differs from window, resize window once
+        iw, ih = self.image_surface.get_width(), self.image_surface.get_height()
+        size = self.viewport_size or (iw, ih)
+        if size != (self.w, self.h):
+            self.w, self.h = size
+            self.screen = pygame.display.set_mode((self.w, self.h))
+        if self.viewport_size is not None:
+            self.viewport = Viewport(size, (iw, ih))
+            # Mip levels and tiles are built off the render loop; the viewport scales directly until then.
+            self.pyramid_builder = PyramidBuilder(surface)
+        # mark the moment image finished loading to optionally draw secret element
+        self.just_loaded_at = pygame.time.get_ticks()
+        self.session_dirty = True
 
     def draw_play(self):
         if self.image_surface is None:
-            self.image_surface = load_image_surface(self.image_path)
-            # If image size differs from window, resize window once
-            iw, ih = self.image_surface.get_width(), self.image_surface.get_height()
-            if (iw, ih) != (self.w, self.h):
-                self.w, self.h = iw, ih
-                self.screen = pygame.display.set_mode((self.w, self.h))
-            # mark the moment image finished loading to optionally draw secret element
-            self.just_loaded_at = pygame.time.get_ticks()
-        self.screen.blit(self.image_surface, (0, 0))
+            self._show_scene(load_image_surface(self.image_path))
+        if self.viewport is not None:
+            self.screen.fill(BG_COLOR)
+            self.viewport.update(self.clock.get_time() / 1000)
+            pyramid = self.pyramid_builder.pyramid if self.pyramid_builder is not None else None
+            self.viewport.draw(self.screen, pyramid, self.image_surface)
+            if pyramid is not None:
+                self.memory.track("pyramid", "current", pyramid.nbytes(), VALUE_PYRAMID, evict=self._drop_pyramid)
+            self.memory.track(
+                "tiles", "viewport", self.viewport.cache_bytes, VALUE_SCALED_TILES, evict=self._drop_scaled_tiles
+            )
+        else:
+            self.screen.blit(self.image_surface, (0, 0))
 
         # HUD
-        hud_bg = pygame.Surface((self.w, 44), pygame.SRCALPHA)
-        hud_bg.fill((0, 0, 0, 150))
-        self.screen.blit(hud_bg, (0, 0))
-        info = self.font.render(
-            f"Tolerance: ±{self.tolerance}px | Click near hidden target!",
-            True,
-            TEXT_COLOR,
-        )
-        self.screen.blit(info, (10, 10))
+        self.screen.blit(self.cached_overlay((self.w, 44), (0, 0, 0, 150)), (0, 0))
+        text = f"Tolerance: ±{self.tolerance}px | Click near hidden target!"
+        if self.hud_label is None or self.hud_label[0] != text:
+            self.hud_label = (text, self.font.render(text, True, TEXT_COLOR))
+        self.screen.blit(self.hud_label[1], (10, 10))
 
         # Draw secret element (target indicator) briefly after load, or always if DEBUG_SHOW_TARGET is set
         show_marker = False
@@ -243,17 +721,16 @@ class Game:
         if show_marker:
             # subtle, semi-transparent indicator at the mapped coordinates
             color = (255, 255, 255)
-            pygame.draw.circle(self.screen, color, self.target, 8, 2)
-            pygame.draw.circle(self.screen, color, self.target, max(2, self.tolerance // 3), 1)
+            target = self.to_screen(self.target)
+            pygame.draw.circle(self.screen, color, target, 8, 2)
+            pygame.draw.circle(self.screen, color, target, self.screen_len(max(2, self.tolerance // 3)), 1)
 
         # Optional: draw a faint bounding box around tolerance when debugging
         # pygame.draw.rect(self.screen, (255,255,255), pygame.Rect(self.target[0]-self.tolerance, self.target[1]-self.tolerance, self.tolerance*2, self.tolerance*2), 1)
 
     def draw_result(self, success: bool):
         self.draw_play()  # show image underneath
-        overlay = pygame.Surface((self.w, self.h), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 160))
-        self.screen.blit(overlay, (0, 0))
+        self.screen.blit(self.cached_overlay((self.w, self.h), (0, 0, 0, 160)), (0, 0))
 
         msg = "Success!" if success else "Miss!"
         color = SUCCESS_COLOR if success else FAIL_COLOR
@@ -263,8 +740,9 @@ class Game:
         )
 
         # Draw the target location marker
-        pygame.draw.circle(self.screen, color, self.target, 10, 3)
-        pygame.draw.circle(self.screen, color, self.target, self.tolerance, 1)
+        target = self.to_screen(self.target)
+        pygame.draw.circle(self.screen, color, target, 10, 3)
+        pygame.draw.circle(self.screen, color, target, self.screen_len(self.tolerance), 1)
 
         mouse = pygame.mouse.get_pos()
         self.btn_new_round.draw(
@@ -274,6 +752,8 @@ class Game:
         right_y = 50
         self.btn_easier.draw(self.screen, self.font, self.btn_easier.is_hover(mouse))
         self.btn_harder.draw(self.screen, self.font, self.btn_harder.is_hover(mouse))
+        if self.level_parent is not None:
+            self.btn_back.draw(self.screen, self.font, self.btn_back.is_hover(mouse))
 
     def pick_file_dialog(self) -> Optional[str]:
         # Avoid Tk on macOS due to known crash with SDL/Pygame (NSInvalidArgumentException macOSVersion).
@@ -356,55 +836,226 @@ class Game:
 
     def new_round(self):
         self.round_seed = random.randint(0, 2**31 - 1)
-        # Generate prompt JSON
-        prompt_json = try_generate_prompt(seed=self.round_seed)
-        # Generate coordinates in the base 768x1344 space to remain consistent with prompts
-        legacy_x, legacy_y = gen_coords(BASE_W, BASE_H)
-        self.target = (legacy_x, legacy_y)
-        print(f"[Round] seed={self.round_seed} | base_coords(768x1344)=({legacy_x}, {legacy_y})")
-        # Generate image via nano_banana using legacy coordinates
-        self.prompt_json_cache = prompt_json
-        self.image_path, self.image_generator = try_generate_image(
-            prompt_json, self.target, self.custom_image_path
+        self.prompt_json_cache, self.image_path, self.image_generator, self.target = resolve_round(
+            self.round_seed, self.custom_image_path, cancel_token=self.cancel_token
         )
         self.image_surface = None  # force reload and window resize in draw_play
-        # After image exists, attempt face localization to determine actual coordinates
         self.just_loaded_at = None  # will be set on first draw after load
-        if self.image_path and os.path.exists(self.image_path):
-            detected = None
-            if self.image_generator and self.custom_image_path and os.path.exists(self.custom_image_path):
-                try:
-                    detected = self.image_generator.detect_face_center(self.image_path, self.custom_image_path)
-                except Exception:
-                    traceback.print_exc()
-                    detected = None
-            if detected:
-                dx, dy = detected
-                # Since display surface is scaled to BASE (768x1344) in load_image_surface, dx,dy are already in that space
-                self.target = (dx, dy)
-                print(f"[Round] face center detected at BASE coords=({dx}, {dy})")
-            else:
-                # Legacy proportional mapping fallback
-                try:
-                    raw = pygame.image.load(self.image_path)
-                    ow, oh = raw.get_width(), raw.get_height()
-                    del raw
-                except Exception:
-                    ow, oh = -1, -1
-                temp_surface = load_image_surface(self.image_path)  # may rescale to BASE
-                iw, ih = temp_surface.get_width(), temp_surface.get_height()
-                sx = iw / float(BASE_W)
-                sy = ih / float(BASE_H)
-                new_x = int(legacy_x * sx)
-                new_y = int(legacy_y * sy)
-                new_x = clamp(new_x, 0, max(0, iw - 1))
-                new_y = clamp(new_y, 0, max(0, ih - 1))
-                self.target = (new_x, new_y)
-                print(f"[Round] fallback mapping image_original_size=({ow}x{oh}), play_surface_size=({iw}x{ih}), final_target=({new_x}, {new_y})")
+        self.level_index, self.level_parent = level_position(self.image_generator)
+
+    def start_worker(self):
+        if not GENERATION_WORKER or ImageGenerator is None:
+            warm_up_sdks()
+            return
+        try:
+            from generation_worker import GenerationWorker
+
+            self.worker = GenerationWorker()
+            # The hand-off slots are mapped in this process for the worker's whole life.
+            self.memory.track("worker_slots", "shared", self.worker.slot_bytes, PINNED)
+        except Exception:
+            traceback.print_exc()
+            print("[Worker] could not start generation worker; generating in-process")
+            self.worker = None
+            warm_up_sdks()
+
+    def start_round(self, msg: str):
+        if self.session is not None:
+            self.resume_session()
+            return
+        self.return_state = "menu" if self.state == "menu" else "result"
+        if self.worker is not None:
+            if self.pending_job is not None or not self.worker.has_free_slot:
+                return
+            self.round_seed = random.randint(0, 2**31 - 1)
+            self.pending_job = self.worker.submit("round", seed=self.round_seed, custom_image=self.custom_image_path)
+            self.pending_easier = None
+            self.loading_msg = msg
+            self.state = "loading"
+            return
+        self.state = "loading"
+        # No worker: generate synchronously
+        try:
+            self.draw_loading(msg)
+            pygame.display.flip()
+            self.new_round()
+            self.state = "play"
+        except Exception:
+            traceback.print_exc()
+            self.image_path = None
+            self.image_surface = None
+            self.state = "play"
+
+    def start_adjust(self, easier: bool):
+        if self.worker is None:
+            self.adjust_level(easier=easier)
+            return
+        if self.pending_job is not None or not self.worker.has_free_slot:
+            return
+        self.return_state = "result"
+        self.pending_job = self.worker.submit("adjust", easier=easier, custom_image=self.custom_image_path)
+        self.pending_easier = easier
+        self.loading_msg = "Making it easier…" if easier else "Making it harder…"
+        self.state = "loading"
+
+    def start_goto(self, index: int):
+        if self.worker is None:
+            if self.image_generator is None:
+                return
+            status, image_path, target = resolve_goto(self.image_generator, index)
+            self.level_index, self.level_parent = level_position(self.image_generator)
+            self._apply_goto(status, image_path, target)
+            return
+        if self.pending_job is not None or not self.worker.has_free_slot:
+            return
+        self.return_state = "result"
+        self.pending_job = self.worker.submit("goto", index=index)
+        self.pending_easier = None
+        self.loading_msg = "Going back…"
+        self.state = "loading"
+
+    def resume_session(self):
+        """Serve the saved round from local state; the generator is rebuilt here or in the worker."""
+        snapshot, self.session = self.session, None
+        saved = snapshot["round"]
+        self.prompt_json_cache = saved.get("prompt_json")
+        self.round_seed = saved.get("seed")
+        self.image_path = saved["image_path"]
+        self.target = tuple(saved["target"])
+        self.tolerance = saved.get("tolerance", TARGET_TOLERANCE_INITIAL)
+        self.custom_image_path = self.custom_image_path or saved.get("custom_image")
+        generator_state = snapshot.get("generator")
+        self.generator_state = generator_state
+        self.level_index = self.level_parent = None
+        if generator_state is not None:
+            try:
+                if self.worker is not None and self.worker.has_free_slot:
+                    # Fire and forget: later jobs queue behind it, so Easier/Harder/Back see the restored chain.
+                    self.worker.submit("restore", state=generator_state)
+                else:
+                    self.image_generator = restore_generator(generator_state)
+                current = generator_state.get("current_level")
+                if current is not None:
+                    self.level_index, self.level_parent = current, generator_state["levels"][current]["parent"]
+            except Exception:
+                traceback.print_exc()
+        print(f"[Session] resumed round seed={self.round_seed} level={self.level_index} image={self.image_path}")
+        self.image_surface = None
+        self.just_loaded_at = None
+        self.state = "play"
+
+    def session_state(self) -> Optional[dict]:
+        if self.image_path is None or not os.path.exists(self.image_path):
+            return None
+        return {
+            "prompt_json": self.prompt_json_cache,
+            "seed": self.round_seed,
+            "image_path": os.path.abspath(self.image_path),
+            "target": list(self.target),
+            "tolerance": self.tolerance,
+            "custom_image": self.custom_image_path,
+        }
+
+    def save_session(self, force: bool = False):
+        """Snapshot the session if it changed, at most every SESSION_SAVE_INTERVAL_S unless forced."""
+        if not self.session_dirty:
+            return
+        now = time.monotonic()
+        if not force and now - self.session_saved_at < SESSION_SAVE_INTERVAL_S:
+            return
+        round_state = self.session_state()
+        if round_state is None:
+            return
+        if self.worker is None:
+            generator_state = self.image_generator.to_state() if self.image_generator is not None else None
         else:
-            # fallback to default window size mapping
-            self.target = gen_coords(self.w, self.h)
-            print(f"[Round] image generation failed; fallback target=({self.target[0]}, {self.target[1]}) on window {self.w}x{self.h}")
+            generator_state = self.generator_state
+        if save_session(round_state, generator_state):
+            self.session_dirty = False
+            self.session_saved_at = now
+
+    def cancel_pending(self):
+        if self.worker is None or self.pending_job is None:
+            return
+        print(f"[Worker] cancelling job {self.pending_job}")
+        self.worker.cancel(self.pending_job)
+        self.pending_job = None
+        self.state = self.return_state
+
+    def poll_worker(self):
+        if self.worker is None:
+            return
+        if not self.worker.is_alive():
+            print("[Worker] generation worker exited; generating in-process from now on")
+            self.worker.drop_pending()
+            self.worker = None
+            self.memory.release("image_bytes", "generator")  # went away with the worker process
+            if self.pending_job is not None:
+                self.pending_job = None
+                self.state = self.return_state
+            return
+        for result in self.worker.poll():
+            if "image_bytes" in result:
+                self._track_generator_images(result["image_bytes"], releasable=result["kind"] != "release")
+            # Results of cancelled jobs still arrive; only the job we are waiting for matters.
+            if result["id"] != self.pending_job:
+                continue
+            self.pending_job = None
+            self._apply_worker_result(result)
+
+    def _apply_worker_result(self, result: dict):
+        status, kind = result["status"], result["kind"]
+        if status == "aborted" or (kind != "round" and status != "ok"):
+            self.state = self.return_state
+            return
+        self.level_index, self.level_parent = result.get("level") or (None, None)
+        self.generator_state = result.get("session")
+        if kind == "adjust":
+            self._apply_adjust(self.pending_easier, status, result.get("image_path"), result.get("target"))
+        elif kind == "goto":
+            self._apply_goto(status, result.get("image_path"), result.get("target"))
+        elif status == "ok":
+            self.prompt_json_cache = result.get("prompt_json")
+            self.image_path = result.get("image_path")
+            self.target = tuple(result["target"])
+        else:
+            print(f"[Worker] round failed: {result.get('error')}")
+            self.image_path = None
+        self.image_surface = None
+        self.just_loaded_at = None
+        self.state = "play"
+        if result.get("surface") is not None:
+            # Pixels were decoded and scaled in the worker; only the pixel-format conversion happens here.
+            self._show_scene(result["surface"].convert())
+
+    def to_screen(self, pt: Tuple[int, int]) -> Tuple[int, int]:
+        return self.viewport.base_to_screen(pt) if self.viewport is not None else pt
+
+    def screen_len(self, length: int) -> int:
+        return self.viewport.scale_length(length) if self.viewport is not None else length
+
+    def handle_view_event(self, event) -> bool:
+        """Zoom/pan input for the viewport; returns True if the event was consumed."""
+        view = self.viewport
+        if view is None or self.state not in ("play", "result"):
+            return False
+        if event.type == pygame.MOUSEWHEEL:
+            view.zoom_at(pygame.mouse.get_pos(), ZOOM_STEP ** event.y)
+        elif event.type == pygame.MOUSEMOTION and (event.buttons[1] or event.buttons[2]):
+            view.pan(*event.rel)
+        elif event.type == pygame.KEYDOWN and event.key in (pygame.K_0, pygame.K_HOME):
+            view.reset()
+        elif event.type == pygame.KEYDOWN and event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+            view.zoom_at((self.w // 2, self.h // 2), ZOOM_STEP)
+        elif event.type == pygame.KEYDOWN and event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+            view.zoom_at((self.w // 2, self.h // 2), 1 / ZOOM_STEP)
+        elif event.type == pygame.KEYDOWN and event.key in (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN):
+            dx = {pygame.K_LEFT: PAN_STEP, pygame.K_RIGHT: -PAN_STEP}.get(event.key, 0)
+            dy = {pygame.K_UP: PAN_STEP, pygame.K_DOWN: -PAN_STEP}.get(event.key, 0)
+            view.pan(dx, dy)
+        else:
+            return False
+        return True
 
     def handle_click(self, pos):
         px, py = pos
@@ -418,61 +1069,81 @@ class Game:
             # Make easier: increase tolerance but not above 200
             self.tolerance = min(200, int(self.tolerance * 1.25) + 1)
         self.state = "result"
-
-    def _update_image_from_generator(self):
-        # Try to read the latest generated file from the ImageGenerator instance
-        if self.image_generator is None:
-            return
-        img_path = getattr(self.image_generator, "_current_level_image", None)
-        if img_path and os.path.exists(img_path):
-            self.image_path = img_path
+        self.session_dirty = True
 
     def adjust_level(self, easier: bool):
         if self.image_generator is None:
             return
-        # Pick new coordinates in base space (768x1344)
-        new_x, new_y = gen_coords(BASE_W, BASE_H)
         try:
-            if easier:
-                print(f"[Adjust] make_easier to=({new_x}, {new_y})")
-                self.image_generator.make_easier(new_x, new_y)
-                # Also adjust in-game tolerance a bit to be easier
-                self.tolerance = min(200, int(self.tolerance * 1.25) + 1)
-            else:
-                print(f"[Adjust] make_harder to=({new_x}, {new_y})")
-                self.image_generator.make_harder(new_x, new_y)
-                # Adjust in-game tolerance to be harder
-                self.tolerance = max(5, int(self.tolerance * 0.8))
-            # After generation, update the image path from generator
-            self._update_image_from_generator()
-            # Try to detect actual location after rework if possible
-            detected = None
-            if self.image_generator and self.custom_image_path and self.image_path and os.path.exists(self.image_path) and os.path.exists(self.custom_image_path):
-                try:
-                    detected = self.image_generator.detect_face_center(self.image_path, self.custom_image_path)
-                except Exception:
-                    traceback.print_exc()
-                    detected = None
-            if detected:
-                self.target = detected
-                print(f"[Adjust] face center detected at BASE coords={detected}")
-            else:
-                # Fallback: assume the requested new coords
-                self.target = (new_x, new_y)
-            # Force reload
-            self.image_surface = None
-            self.just_loaded_at = None
-            # Return to play to see the updated image
-            self.state = "play"
+            status, image_path, target = resolve_adjust(
+                self.image_generator, easier, self.custom_image_path, cancel_token=self.cancel_token
+            )
         except Exception:
             traceback.print_exc()
+            return
+        self.level_index, self.level_parent = level_position(self.image_generator)
+        self._apply_adjust(easier, status, image_path, target)
+
+    def _apply_adjust(self, easier: bool, status: str, image_path: Optional[str], target: Optional[Tuple[int, int]]):
+        if status != "ok":
+            return
+        if easier:
+            # Also adjust in-game tolerance a bit to be easier
+            self.tolerance = min(200, int(self.tolerance * 1.25) + 1)
+        else:
+            # Adjust in-game tolerance to be harder
+            self.tolerance = max(5, int(self.tolerance * 0.8))
+        if image_path:
+            self.image_path = image_path
+        self.target = target
+        # Force reload
+        self.image_surface = None
+        self.just_loaded_at = None
+        # Return to play to see the updated image
+        self.state = "play"
+
+    def _apply_goto(self, status: str, image_path: Optional[str], target: Optional[Tuple[int, int]]):
+        if status != "ok":
+            return
+        # Tolerance tracks the player, not the level, so it is left as is.
+        self.image_path = image_path
+        self.target = tuple(target)
+        self.image_surface = None
+        self.just_loaded_at = None
+        self.state = "play"
+
+    def toggle_profiler(self):
+        if self.profiler is None:
+            self.profiler = Profiler(interval=PROFILE_INTERVAL_S)
+            self.profiler.start()
+        else:
+            self.profiler.stop()
+            self.profiler = None
+
+    def draw_profile_overlay(self):
+        timer = self.profiler.frames
+        label = self.font.render(
+            f"FPS {timer.fps():.0f} | 1% low {timer.low_1pct_fps():.0f} | F9 stops profiling", True, TEXT_COLOR
+        )
+        rect = label.get_rect(bottomright=(self.w - 10, self.h - 10))
+        pygame.draw.rect(self.screen, BG_COLOR, rect.inflate(12, 8))
+        self.screen.blit(label, rect)
 
     def run(self):
         running = True
+        first_frame = True
+        if PROFILE_AT_START:
+            self.toggle_profiler()
         while running:
+            if self.profiler is not None:
+                self.profiler.frames.begin_frame()
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
+                    if self.cancel_token is not None:
+                        self.cancel_token.cancel()
+                elif self.handle_view_event(event):
+                    pass
                 elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                     if self.state == "menu":
                         mouse = event.pos
@@ -481,51 +1152,59 @@ class Game:
                             if path and os.path.exists(path):
                                 self.custom_image_path = path
                         elif self.btn_start.is_hover(mouse):
-                            self.state = "loading"
-                            # Trigger generation synchronously for simplicity
-                            try:
-                                self.draw_loading("Generating prompt and image…")
-                                pygame.display.flip()
-                                self.new_round()
-                                self.state = "play"
-                            except Exception:
-                                traceback.print_exc()
-                                self.image_path = None
-                                self.image_surface = None
-                                self.state = "play"
+                            self.start_round("Generating prompt and image…")
                     elif self.state == "play":
-                        self.handle_click(event.pos)
+                        # Hit testing happens in scene coordinates; clicks outside the scene are ignored.
+                        pos = self.viewport.screen_to_base(event.pos) if self.viewport is not None else event.pos
+                        if pos is not None:
+                            self.handle_click(pos)
                     elif self.state == "result":
                         mouse = event.pos
                         if self.btn_new_round.is_hover(mouse):
-                            self.state = "loading"
-                            try:
-                                self.draw_loading("Generating next round…")
-                                pygame.display.flip()
-                                self.new_round()
-                                self.state = "play"
-                            except Exception:
-                                traceback.print_exc()
-                                self.image_path = None
-                                self.image_surface = None
-                                self.state = "play"
+                            self.start_round("Generating next round…")
                         elif self.btn_easier.is_hover(mouse):
-                            self.adjust_level(easier=True)
+                            self.start_adjust(easier=True)
                         elif self.btn_harder.is_hover(mouse):
-                            self.adjust_level(easier=False)
+                            self.start_adjust(easier=False)
+                        elif self.level_parent is not None and self.btn_back.is_hover(mouse):
+                            self.start_goto(self.level_parent)
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE and self.state == "loading":
+                    self.cancel_pending()
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F9:
+                    self.toggle_profiler()
 
+            self.poll_worker()
+            self.save_session()
+            if self.profiler is not None:
+                self.profiler.frames.mark("events")
             if self.state == "menu":
                 self.draw_menu()
             elif self.state == "loading":
-                self.draw_loading("Generating…")
+                self.draw_loading(self.loading_msg)
             elif self.state == "play":
                 self.draw_play()
             elif self.state == "result":
                 self.draw_result(success=(self.last_result == "success"))
+            if self.profiler is not None:
+                self.draw_profile_overlay()
+                self.profiler.frames.mark("draw")
 
             pygame.display.flip()
+            if self.profiler is not None:
+                self.profiler.frames.mark("flip")
+            if first_frame:
+                first_frame = False
+                print(f"[Startup] first frame after {(time.perf_counter() - STARTUP_T0) * 1000:.0f} ms")
+                if STARTUP_BENCH:
+                    break
+                self.start_worker()
             self.clock.tick(60)
 
+        if self.profiler is not None:
+            self.toggle_profiler()  # writes the reports
+        self.save_session(force=True)
+        if self.worker is not None:
+            self.worker.shutdown()
         pygame.quit()
 
 
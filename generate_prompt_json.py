@@ -16,11 +16,16 @@ Usage:
   python generate_prompt_json.py [--model MODEL] [--seed N] [--out FILE]
 
 Environment:
-  OPENROUTER_API_KEY  Required.
+  OPENROUTER_API_KEY  Required for remote generation.
   OPENROUTER_MODEL    Optional default model name (overridden by --model). Example: "meta-llama/llama-3.1-8b-instruct".
+  PROMPT_MODELS       Optional candidate list for latency-aware routing, e.g. "openrouter/auto@1,meta-llama/llama-3.1-8b-instruct@2"
+                      (see model_router.py). Used when no model is given explicitly.
+  PROMPT_MODE         Optional default mode: "remote" (default), "local" or "auto".
 
 Notes:
-- This script always uses OpenRouter and will error if no API key is configured.
+- "remote" uses OpenRouter and will error if no API key is configured.
+- "local" builds the prompt from the catalogs below with a seeded RNG (no network, microseconds per call).
+- "auto" tries OpenRouter and falls back to the local synthesizer.
 - Minimal addition to repo: this single file; existing code remains untouched.
 """
 
@@ -29,14 +34,17 @@ import json
 import os
 import random
 import sys
-from typing import Dict, Optional
+from collections import deque
+from typing import Deque, Dict, Optional, Sequence, Tuple
 
 import datetime
+import time
 
-try:
-    import requests  # type: ignore
-except Exception:
-    requests = None  # Fallback if requests isn't installed; local mode will still work.
+from model_router import default_router
+
+# HTTP clients are imported on first use (see _load_requests/_load_httpx) to keep them off the game's startup path.
+requests = None
+httpx = None
 
 
 STYLES = [
@@ -86,15 +94,75 @@ SCENERY_TEMPLATES = [
     "A cliffside temple at sunset, bells tolling softly as pilgrims ascend wide stone steps.",
 ]
 
+# Vocabularies for the local synthesizer, as (value, weight). Weights lean towards busy, detailed scenes
+# since those make the hidden face harder to spot.
+LEVELS_OF_DETAIL = [
+    ("high", 5),
+    ("medium", 3),
+    ("intricate, every corner filled with small stories", 2),
+    ("low", 1),
+]
+
+CROWD_DENSITIES = [
+    ("dense", 5),
+    ("packed shoulder to shoulder", 3),
+    ("medium", 2),
+    ("sparse", 1),
+]
+
+COLOR_PALETTES = [
+    ("vibrant", 4),
+    ("warm earth tones", 2),
+    ("pastel", 2),
+    ("muted", 2),
+    ("jewel tones", 2),
+    ("neon on dark", 1),
+    ("sepia", 1),
+    ("monochrome", 1),
+]
+
+PROMPT_MODES = ("remote", "local", "auto")
+
+# Recent (style, world_setting, scenery) picks; the synthesizer avoids repeating them while alternatives remain.
+_RECENT_PROMPTS: Deque[Tuple[str, str, str]] = deque(maxlen=6)
+
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
 
 
-def _openrouter_generate(model: str, seed: Optional[int]) -> Optional[Dict[str, str]]:
+def _load_requests():
+    global requests
+    if requests is None:
+        try:
+            import requests as _requests  # type: ignore
+        except Exception:
+            return None  # Fallback if requests isn't installed; local mode will still work.
+        requests = _requests
+    return requests
+
+
+def _load_httpx():
+    global httpx
+    if httpx is None:
+        try:
+            import httpx as _httpx  # type: ignore
+        except Exception:
+            return None
+        httpx = _httpx
+    return httpx
+
+
+def warm_up() -> None:
+    """Import the HTTP clients ahead of the first call, e.g. from a background thread while a menu is shown."""
+    _load_requests()
+    _load_httpx()
+
+
+def _openrouter_request(model: str, seed: Optional[int]) -> Optional[Tuple[Dict[str, str], dict]]:
+    """Headers and JSON body for an OpenRouter chat completion, or None if no API key is configured."""
     api_key = OPENROUTER_API_KEY
     if not api_key:
         return None
-    if requests is None:
-        return None
 
     # Compose a compact but strict instruction to ensure JSON-only output.
     system_prompt = (
@@ -143,16 +211,11 @@ def _openrouter_generate(model: str, seed: Optional[int]) -> Optional[Dict[str,
     if seed is not None:
         # OpenRouter supports a seed field for some backends
         body["seed"] = int(seed)
+    return headers, body
+
 
+def _parse_openrouter_response(data: dict) -> Optional[Dict[str, str]]:
     try:
-        resp = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers=headers,
-            data=json.dumps(body),
-            timeout=30,
-        )
-        resp.raise_for_status()
-        data = resp.json()
         content = (
             data.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
         )
@@ -182,16 +245,90 @@ def _openrouter_generate(model: str, seed: Optional[int]) -> Optional[Dict[str,
         return None
 
 
+def _openrouter_generate(model: str, seed: Optional[int]) -> Optional[Dict[str, str]]:
+    request = _openrouter_request(model, seed)
+    if request is None or _load_requests() is None:
+        return None
+    headers, body = request
+    try:
+        resp = requests.post(
+            OPENROUTER_URL,
+            headers=headers,
+            data=json.dumps(body),
+            timeout=30,
+        )
+        resp.raise_for_status()
+        return _parse_openrouter_response(resp.json())
+    except Exception:
+        return None
+
+
+async def _aopenrouter_generate(model: str, seed: Optional[int], http_client=None) -> Optional[Dict[str, str]]:
+    request = _openrouter_request(model, seed)
+    if request is None or _load_httpx() is None:
+        return None
+    headers, body = request
+    try:
+        if http_client is None:
+            async with httpx.AsyncClient(timeout=30) as client:
+                resp = await client.post(OPENROUTER_URL, headers=headers, content=json.dumps(body))
+        else:
+            resp = await http_client.post(OPENROUTER_URL, headers=headers, content=json.dumps(body), timeout=30)
+        resp.raise_for_status()
+        return _parse_openrouter_response(resp.json())
+    except Exception:
+        return None
+
+
+def _pick(rng: random.Random, options: Sequence, recent=()) -> str:
+    # options are plain strings or (value, weight) pairs; recently used values are skipped while others remain.
+    weighted = [o if isinstance(o, tuple) else (o, 1) for o in options]
+    fresh = [o for o in weighted if o[0] not in recent] or weighted
+    values, weights = zip(*fresh)
+    return rng.choices(values, weights=weights, k=1)[0]
+
+
+def synthesize_prompt(
+    seed: Optional[int] = None,
+    history: Optional[Deque[Tuple[str, str, str]]] = None,
+) -> Dict[str, str]:
+    """
+    Build a prompt JSON locally from the curated catalogs; no network.
+
+    The same seed and history always give the same result. Styles, world settings and sceneries used by the
+    prompts in history (module-wide recent history by default) are avoided; the new pick is appended to it.
+    """
+    rng = random.Random(seed)
+    if history is None:
+        history = _RECENT_PROMPTS
+    recent_styles = {h[0] for h in history}
+    recent_worlds = {h[1] for h in history}
+    recent_sceneries = {h[2] for h in history}
+    result = {
+        "style": _pick(rng, STYLES, recent_styles),
+        "scenery": _pick(rng, SCENERY_TEMPLATES, recent_sceneries),
+        "world_setting": _pick(rng, WORLD_SETTINGS, recent_worlds),
+        "level_of_detail": _pick(rng, LEVELS_OF_DETAIL),
+        "crowd_density": _pick(rng, CROWD_DENSITIES),
+        "color_palette": _pick(rng, COLOR_PALETTES),
+    }
+    history.append((result["style"], result["world_setting"], result["scenery"]))
+    return result
+
+
 def generate_prompt(
     model: Optional[str] = None,
     seed: Optional[int] = None,
+    mode: Optional[str] = None,
 ) -> Dict[str, str]:
     """
     Programmatic API to generate a prompt JSON.
 
     Parameters:
-    - model: OpenRouter model name. If None, uses env OPENROUTER_MODEL or default.
-    - seed: Optional integer seed for determinism (passed to API when supported).
+    - model: OpenRouter model name. If None, the model router picks the fastest healthy PROMPT_MODELS candidate
+      (env OPENROUTER_MODEL or "openrouter/auto" unless configured).
+    - seed: Optional integer seed for determinism (passed to API when supported; fully deterministic locally).
+    - mode: "remote", "local" or "auto". If None, uses env PROMPT_MODE or "remote".
 
     Returns:
     - Dict with keys: style, scenery, world_setting, level_of_detail, crowd_density, color_palette.
@@ -201,10 +338,51 @@ def generate_prompt(
         data = generate_prompt(seed=42)
         # data -> {"style": "...", "scenery": "...", "world_setting": "...", "level_of_detail": "...", "crowd_density": "...", "color_palette": "..."}
     """
-    if model is None:
-        model = os.getenv("OPENROUTER_MODEL", "openrouter/auto")
-
+    mode, model, routed = _resolve_mode(mode, model)
+    if mode == "local":
+        return synthesize_prompt(seed)
+    started = time.monotonic()
     result: Optional[Dict[str, str]] = _openrouter_generate(model, seed)
+    return _finish_remote(result, mode, model, routed, seed, started)
+
+
+async def agenerate_prompt(
+    model: Optional[str] = None,
+    seed: Optional[int] = None,
+    mode: Optional[str] = None,
+    http_client=None,
+) -> Dict[str, str]:
+    """
+    Async counterpart of generate_prompt(), using httpx so many prompts can be in flight on one event loop.
+    Pass an httpx.AsyncClient as http_client to reuse connections across calls; otherwise one is opened per call.
+    """
+    mode, model, routed = _resolve_mode(mode, model)
+    if mode == "local":
+        return synthesize_prompt(seed)
+    started = time.monotonic()
+    result = await _aopenrouter_generate(model, seed, http_client=http_client)
+    return _finish_remote(result, mode, model, routed, seed, started)
+
+
+def _resolve_mode(mode: Optional[str], model: Optional[str]) -> Tuple[str, Optional[str], bool]:
+    if mode is None:
+        mode = os.getenv("PROMPT_MODE", "remote")
+    if mode not in PROMPT_MODES:
+        raise ValueError(f"Unknown prompt mode {mode!r}; expected one of {', '.join(PROMPT_MODES)}")
+    routed = model is None and mode != "local"
+    if routed:
+        model = default_router().choose("prompt")
+    return mode, model, routed
+
+
+def _finish_remote(
+    result: Optional[Dict[str, str]], mode: str, model: str, routed: bool, seed: Optional[int], started: float
+) -> Dict[str, str]:
+    if routed and OPENROUTER_API_KEY:
+        # Without a key nothing was sent, so there is no latency to learn from.
+        default_router().record("prompt", model, time.monotonic() - started, ok=result is not None)
+    if result is None and mode == "auto":
+        return synthesize_prompt(seed)
     if result is None:
         raise RuntimeError(
             "OpenRouter generation failed or returned invalid response. Ensure OPENROUTER_API_KEY and model are set."
@@ -0,0 +1,253 @@
+"""
+Long-lived generation worker process.
+
+The worker owns the ImageGenerator and the prompt/detection clients and runs each job end to end in its own
+process: network I/O, JSON parsing, PNG decoding and scaling to the BASE canvas never share the UI's GIL.
+Finished scenes come back as raw RGBA pixels written into a multiprocessing.shared_memory slot owned by the UI
+process, so the render loop only has to wrap the buffer in a Surface and blit it.
+
+UI side:
+    worker = GenerationWorker()
+    job_id = worker.submit("round", seed=123, custom_image=path)
+    ...
+    for result in worker.poll():  # non-blocking, call once per frame
+        result["surface"]  # pygame.Surface (BASE_W x BASE_H) or None if nothing could be decoded
+        result["image_bytes"]  # in-memory level image bytes the worker's generator now holds
+    worker.release_images()  # drop those copies (e.g. when the UI's memory budget evicts them)
+    worker.shutdown()
+"""
+
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import traceback
+from multiprocessing import shared_memory
+from typing import Optional
+
+# Must match game.BASE_W/BASE_H; duplicated so the UI process does not import game from here.
+BASE_W, BASE_H = 768, 1344
+FRAME_BYTES = BASE_W * BASE_H * 4  # one RGBA scene
+
+
+class GenerationWorker:
+    """UI-side handle: owns the shared-memory slots and the queues to a spawned worker process."""
+
+    def __init__(self, slots: int = 2):
+        ctx = mp.get_context("spawn")
+        self._slots = [shared_memory.SharedMemory(create=True, size=FRAME_BYTES) for _ in range(slots)]
+        self._free_slots = list(range(slots))
+        self._jobs = ctx.Queue()
+        self._results = ctx.Queue()
+        self._control = ctx.Queue()
+        self._ids = itertools.count(1)
+        self._pending = {}  # job id -> slot index
+        self._process = ctx.Process(
+            target=_worker_main,
+            args=(self._jobs, self._results, self._control, [s.name for s in self._slots]),
+            name="generation-worker",
+            daemon=True,
+        )
+        self._process.start()
+
+    def is_alive(self) -> bool:
+        return self._process.is_alive()
+
+    @property
+    def slot_bytes(self) -> int:
+        """Shared memory held for the hand-off slots, for the UI's memory budget."""
+        return len(self._slots) * FRAME_BYTES
+
+    @property
+    def has_free_slot(self) -> bool:
+        # Slots of cancelled jobs are only released once their (ignored) result has been polled.
+        return bool(self._free_slots)
+
+    def submit(self, kind: str, **params) -> int:
+        """Queue a job ("round", "adjust", "goto", "restore"); returns its id. Results arrive through poll()."""
+        if not self._free_slots:
+            raise RuntimeError("no free shared-memory slot; poll() finished jobs first")
+        job_id = next(self._ids)
+        slot = self._free_slots.pop()
+        self._pending[job_id] = slot
+        self._jobs.put({"id": job_id, "kind": kind, "slot": slot, **params})
+        return job_id
+
+    def release_images(self) -> int:
+        """Ask the worker to drop in-memory level image copies; needs no slot. Its result reports the new size."""
+        job_id = next(self._ids)
+        self._jobs.put({"id": job_id, "kind": "release", "slot": None})
+        return job_id
+
+    def cancel(self, job_id: int):
+        # The worker aborts the job's in-flight calls; its result still arrives with status "aborted".
+        self._control.put(job_id)
+
+    def poll(self) -> list:
+        finished = []
+        while True:
+            try:
+                result = self._results.get_nowait()
+            except queue.Empty:
+                break
+            slot = self._pending.pop(result["id"], None)
+            result["surface"] = self._read_slot(slot) if slot is not None and result.get("pixels") else None
+            if slot is not None:
+                self._free_slots.append(slot)
+            finished.append(result)
+        return finished
+
+    def drop_pending(self) -> list:
+        """Forget all in-flight jobs (e.g. after the worker died); returns their ids."""
+        ids = list(self._pending)
+        self._free_slots.extend(self._pending.values())
+        self._pending.clear()
+        return ids
+
+    def _read_slot(self, slot: int):
+        import pygame
+
+        # frombytes copies, so the slot can be reused as soon as this returns.
+        return pygame.image.frombytes(bytes(self._slots[slot].buf[:FRAME_BYTES]), (BASE_W, BASE_H), "RGBA")
+
+    def shutdown(self, timeout: float = 2.0):
+        for job_id in list(self._pending):
+            self.cancel(job_id)
+        self._jobs.put(None)
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join(timeout)
+        for slot in self._slots:
+            slot.close()
+            slot.unlink()
+        self._slots = []
+
+
+def _decode_scene(path: Optional[str], fallback: str) -> Optional[bytes]:
+    """Decode an image file to BASE_W x BASE_H RGBA bytes without a display (no Surface.convert)."""
+    import pygame
+
+    for candidate in (path, fallback):
+        if not candidate or not os.path.exists(candidate):
+            continue
+        try:
+            img = pygame.image.load(candidate)
+            surf = pygame.Surface(img.get_size(), pygame.SRCALPHA, 32)
+            surf.blit(img, (0, 0))
+            if surf.get_size() != (BASE_W, BASE_H):
+                surf = pygame.transform.smoothscale(surf, (BASE_W, BASE_H))
+            return pygame.image.tobytes(surf, "RGBA")
+        except Exception:
+            traceback.print_exc()
+    return None
+
+
+def _worker_main(jobs, results, control, slot_names):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    import game  # orchestration helpers, breakers and hedge policy live there
+
+    slots = [shared_memory.SharedMemory(name=name) for name in slot_names]
+    lock = threading.Lock()
+    current = {"id": None, "token": None}
+    cancelled = set()
+
+    def listen():
+        while True:
+            try:
+                job_id = control.get()
+            except (EOFError, OSError):
+                return  # UI side went away during shutdown
+            if job_id is None:
+                return
+            with lock:
+                if current["id"] == job_id:
+                    current["token"].cancel()
+                else:
+                    cancelled.add(job_id)
+
+    listener = threading.Thread(target=listen, name="worker-control", daemon=True)
+    listener.start()
+    for warm in (game.warm_up_prompt, game.warm_up_images):
+        if warm is not None:
+            warm()
+
+    image_generator = None
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        token = game.CancelToken() if game.CancelToken is not None else None
+        with lock:
+            skip = job["id"] in cancelled
+            cancelled.discard(job["id"])
+            current["id"], current["token"] = job["id"], token
+        result = {"id": job["id"], "kind": job["kind"], "status": "aborted", "pixels": False}
+        try:
+            if skip:
+                pass
+            elif job["kind"] == "round":
+                prompt_json, image_path, round_generator, target = game.resolve_round(
+                    job["seed"], job.get("custom_image"), cancel_token=token
+                )
+                if token is not None and token.cancelled:
+                    # The UI went back to the previous scene; Easier/Harder/Back must keep working on its generator.
+                    result.update(status="aborted")
+                else:
+                    image_generator = round_generator
+                    result.update(status="ok", prompt_json=prompt_json, image_path=image_path, target=target)
+            elif job["kind"] == "adjust":
+                if image_generator is None:
+                    result.update(status="unavailable")
+                else:
+                    shown = image_generator.current_level
+                    status, image_path, target = game.resolve_adjust(
+                        image_generator, job["easier"], job.get("custom_image"), cancel_token=token
+                    )
+                    if status == "ok" and shown is not None and token is not None and token.cancelled:
+                        # Cancelled during detection: the rework stays in the history, but the level the UI still
+                        # shows becomes current again so the next rework and Back start from it.
+                        image_generator.goto_level(shown)
+                        status = "aborted"
+                    result.update(status=status, image_path=image_path, target=target)
+            elif job["kind"] == "restore":
+                # Session resume: the UI already shows the saved image, so only the generator is rebuilt.
+                image_generator = game.restore_generator(job["state"])
+                result.update(status="ok" if image_generator is not None else "unavailable")
+            elif job["kind"] == "release":
+                if image_generator is not None:
+                    image_generator.release_cached_images()
+                result.update(status="ok")
+            elif job["kind"] == "goto":
+                if image_generator is None:
+                    result.update(status="unavailable")
+                else:
+                    status, image_path, target = game.resolve_goto(image_generator, job["index"])
+                    result.update(status=status, image_path=image_path, target=target)
+            else:
+                result.update(status="failed", error=f"unknown job kind {job['kind']!r}")
+            if result["status"] == "ok" and job["kind"] in ("round", "adjust", "goto"):
+                result["level"] = game.level_position(image_generator)
+                if image_generator is not None:
+                    result["session"] = image_generator.to_state()
+                pixels = _decode_scene(result.get("image_path"), game.ASSET_FALLBACK)
+                if pixels is not None:
+                    slots[job["slot"]].buf[: len(pixels)] = pixels
+                    result["pixels"] = True
+        except Exception as e:
+            traceback.print_exc()
+            result.update(status="failed", error=repr(e))
+        finally:
+            with lock:
+                current["id"], current["token"] = None, None
+        # Every result reports what the generator holds, so the UI's budget stays current.
+        result["image_bytes"] = image_generator.cached_image_bytes() if image_generator is not None else 0
+        results.put(result)
+
+    # Let the listener drain and exit before interpreter teardown closes the queue under it.
+    control.put(None)
+    listener.join(timeout=1.0)
+    for slot in slots:
+        slot.close()
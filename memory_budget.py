@@ -0,0 +1,118 @@
+"""
+Memory accounting for the game's large allocations, with one global budget.
+
+Most of the game's memory is held by pygame surfaces and raw image bytes. SDL allocates the surface pixels, so
+tracemalloc never sees them. Each holder therefore reports its size to a MemoryBudget under a category ("scene",
+"pyramid", "tiles", "overlay", "image_bytes", "worker_slots") with a value. When the total exceeds the budget,
+entries are evicted lowest value first (least recently used among equals) through the callback they registered.
+PINNED entries, and entries without a callback, are counted but never evicted.
+
+With the generation worker on, its level image bytes are counted too: every worker result reports them, and
+evicting them sends the worker a release job. The shared-memory hand-off slots are pinned.
+
+MemoryDiagnostics (KALLY_MEMDIAG=1) takes a tracemalloc snapshot at every game state transition and prints the
+budget usage plus the top Python allocation changes since the previous transition.
+
+  KALLY_MEMORY_BUDGET_MB  global budget in MB (default 256)
+"""
+
+import time
+import tracemalloc
+from typing import Callable, Dict, Optional, Tuple
+
+PINNED = float("inf")
+# Relative values; lower is evicted first.
+VALUE_SCALED_TILES = 1.0  # rebuilt from the pyramid on the next frames
+VALUE_IMAGE_BYTES = 2.0  # in-memory copies of level images that are also on disk
+VALUE_OVERLAY = 3.0  # small, redrawn every frame; recreated on demand
+VALUE_PYRAMID = 4.0  # the viewport falls back to scaling the scene directly without it
+
+
+def surface_nbytes(surface) -> int:
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+
+class MemoryBudget:
+    def __init__(self, limit_bytes: int):
+        self.limit_bytes = limit_bytes
+        # (category, key) -> [nbytes, value, last_used, evict]
+        self._entries: Dict[Tuple[str, object], list] = {}
+        self.total = 0
+        self.evictions = 0
+
+    def track(self, category: str, key, nbytes: int, value: float = 1.0, evict: Optional[Callable[[], None]] = None):
+        """Add or update an entry, mark it used, and evict others if the budget is exceeded."""
+        entry = self._entries.get((category, key))
+        if entry is None:
+            self._entries[(category, key)] = [nbytes, value, time.monotonic(), evict]
+            self.total += nbytes
+        else:
+            self.total += nbytes - entry[0]
+            entry[0], entry[1], entry[2] = nbytes, value, time.monotonic()
+            if evict is not None:
+                entry[3] = evict
+        if self.total > self.limit_bytes:
+            self.enforce()
+
+    def release(self, category: str, key):
+        entry = self._entries.pop((category, key), None)
+        if entry is not None:
+            self.total -= entry[0]
+
+    def release_category(self, category: str):
+        for cat, key in [k for k in self._entries if k[0] == category]:
+            self.release(cat, key)
+
+    def enforce(self) -> int:
+        """Evict lowest-value entries until the total fits the budget; returns bytes freed."""
+        freed = 0
+        candidates = sorted(
+            (k for k, e in self._entries.items() if e[1] != PINNED and e[3] is not None),
+            key=lambda k: (self._entries[k][1], self._entries[k][2]),
+        )
+        for key in candidates:
+            if self.total <= self.limit_bytes:
+                break
+            nbytes, _, _, evict = self._entries[key]
+            self.release(*key)
+            evict()
+            freed += nbytes
+            self.evictions += 1
+            print(f"[Memory] evicted {key[0]}/{key[1]} ({nbytes / 2**20:.1f} MB); total {self.total / 2**20:.1f} MB")
+        return freed
+
+    def usage(self) -> Dict[str, int]:
+        by_category: Dict[str, int] = {}
+        for (category, _), entry in self._entries.items():
+            by_category[category] = by_category.get(category, 0) + entry[0]
+        return by_category
+
+    def summary(self) -> str:
+        parts = " ".join(f"{c}={n / 2**20:.1f}MB" for c, n in sorted(self.usage().items()))
+        return f"{self.total / 2**20:.1f}/{self.limit_bytes / 2**20:.0f} MB ({parts or 'empty'})"
+
+
+class MemoryDiagnostics:
+    def __init__(self, top: int = 10, frames: int = 1):
+        self.top = top
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self._previous: Optional[tracemalloc.Snapshot] = None
+
+    def snapshot(self, label: str, budget: Optional[MemoryBudget] = None):
+        snap = tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            )
+        )
+        current, peak = tracemalloc.get_traced_memory()
+        line = f"[MemDiag] {label}: python heap {current / 2**20:.1f} MB (peak {peak / 2**20:.1f} MB)"
+        if budget is not None:
+            line += f" | tracked {budget.summary()}"
+        print(line)
+        if self._previous is not None:
+            for stat in snap.compare_to(self._previous, "lineno")[: self.top]:
+                print(f"[MemDiag]   {stat}")
+        self._previous = snap
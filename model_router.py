@@ -0,0 +1,192 @@
+"""
+Latency-aware model routing for image, detection and prompt calls.
+
+Each task has a list of candidate models with a quality tier (1 = best). choose() walks the tiers from best to
+worst (down to the requested bound) and returns the fastest healthy candidate of the first tier that has one,
+using a rolling window of recent latencies and errors per model. Lower tiers are only used while every better
+candidate is unhealthy.
+
+So that the windows follow provider performance over the day, a candidate that has not been called for
+probe_interval seconds (never tried, unhealthy, or simply slower) gets one probe call before the fastest one is
+used again; the probe's outcome refreshes its window.
+
+Candidates come from the environment as comma-separated "model@tier" entries (tier defaults to 1):
+  IMAGE_MODELS      default "gemini-2.5-flash-image-preview"
+  DETECTION_MODELS  default "gemini-1.5-flash"
+  PROMPT_MODELS     default $OPENROUTER_MODEL or "openrouter/auto"
+  MODEL_MAX_TIER    optional upper bound on tiers used by default for every task
+  MODEL_PROBE_INTERVAL  seconds between probes of idle candidates (default 60)
+
+Usage:
+    router = default_router()
+    model = router.choose("image")
+    started = time.monotonic()
+    ...call model...
+    router.record("image", model, time.monotonic() - started, ok=True)
+
+describe_last() summarises the calls recorded since the last reset_last(); the game resets it at the start of
+every round and rework, so skipped calls (local prompt, open breaker, reported target) do not show stale entries.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_MODELS = {
+    "image": "gemini-2.5-flash-image-preview",
+    "detection": "gemini-1.5-flash",
+    "prompt": "openrouter/auto",
+}
+
+
+def parse_candidates(spec: str) -> List[Tuple[str, int]]:
+    """Parse "model-a@1, model-b@2" into [("model-a", 1), ("model-b", 2)]."""
+    candidates = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, _, tier = entry.rpartition("@")
+        if not name:
+            name, tier = tier, "1"
+        candidates.append((name, int(tier or 1)))
+    return candidates
+
+
+class ModelStats:
+    def __init__(self, window: int):
+        self._samples = deque(maxlen=window)  # (latency seconds, ok)
+        self.last_attempt = None  # time.monotonic() of the last choose() or record() for this model
+
+    def add(self, latency: float, ok: bool):
+        self._samples.append((latency, ok))
+        self.last_attempt = time.monotonic()
+
+    @property
+    def count(self) -> int:
+        return len(self._samples)
+
+    def latency(self) -> Optional[float]:
+        ok = [lat for lat, success in self._samples if success]
+        return sum(ok) / len(ok) if ok else None
+
+    def error_rate(self) -> float:
+        if not self._samples:
+            return 0.0
+        return sum(1 for _, success in self._samples if not success) / len(self._samples)
+
+
+class ModelRouter:
+    def __init__(
+        self,
+        candidates: Dict[str, List[Tuple[str, int]]],
+        window: int = 20,
+        max_error_rate: float = 0.5,
+        max_tier: Optional[int] = None,
+        probe_interval: float = 60.0,
+    ):
+        self.candidates = candidates
+        self.window = window
+        self.max_error_rate = max_error_rate
+        self.max_tier = max_tier
+        self.probe_interval = probe_interval
+        self._stats: Dict[Tuple[str, str], ModelStats] = {}
+        self._last: Dict[str, Tuple[str, float, bool]] = {}
+        self._lock = threading.Lock()
+
+    def _stats_for(self, task: str, model: str) -> ModelStats:
+        key = (task, model)
+        if key not in self._stats:
+            self._stats[key] = ModelStats(self.window)
+        return self._stats[key]
+
+    def choose(self, task: str, max_tier: Optional[int] = None) -> str:
+        """
+        Return the model to use for task: per tier from best to worst (within max_tier), probe a candidate idle
+        for probe_interval, else take the fastest healthy one; the first tier with either wins.
+        """
+        if max_tier is None:
+            max_tier = self.max_tier
+        options = self.candidates.get(task) or [(DEFAULT_MODELS[task], 1)]
+        eligible = [(name, tier) for name, tier in options if max_tier is None or tier <= max_tier]
+        if not eligible:
+            # Nothing within the bound; fall back to the best tier available rather than failing the call.
+            best = min(tier for _, tier in options)
+            eligible = [(name, tier) for name, tier in options if tier == best]
+        with self._lock:
+            now = time.monotonic()
+            stats = {name: self._stats_for(task, name) for name, _ in eligible}
+
+            def speed(name):
+                latency = stats[name].latency()
+                return float("inf") if latency is None else latency
+
+            choice = None
+            for tier in sorted({tier for _, tier in eligible}):
+                names = [name for name, t in eligible if t == tier]
+                idle = [
+                    name
+                    for name in names
+                    if stats[name].last_attempt is None or now - stats[name].last_attempt >= self.probe_interval
+                ]
+                if idle:
+                    choice = idle[0]
+                    break
+                healthy = [name for name in names if stats[name].error_rate() <= self.max_error_rate]
+                if healthy:
+                    choice = min(healthy, key=speed)
+                    break
+            if choice is None:
+                # Everything is unhealthy and recently probed; use the least bad.
+                choice = min(stats, key=lambda name: stats[name].error_rate())
+            stats[choice].last_attempt = now
+            return choice
+
+    def record(self, task: str, model: str, latency: float, ok: bool):
+        with self._lock:
+            self._stats_for(task, model).add(latency, ok)
+            self._last[task] = (model, latency, ok)
+
+    def last_choice(self, task: str) -> Optional[Tuple[str, float, bool]]:
+        """(model, latency seconds, ok) of the most recent call recorded for task."""
+        with self._lock:
+            return self._last.get(task)
+
+    def reset_last(self):
+        """Forget the last calls, so describe_last() only covers calls made after this (e.g. one round)."""
+        with self._lock:
+            self._last.clear()
+
+    def describe_last(self) -> str:
+        with self._lock:
+            items = sorted(self._last.items())
+        if not items:
+            return "no model calls"
+        return " ".join(
+            f"{task}={model}({latency:.1f}s{'' if ok else ', failed'})" for task, (model, latency, ok) in items
+        )
+
+
+_DEFAULT_ROUTER: Optional[ModelRouter] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_router() -> ModelRouter:
+    """Process-wide router configured from the environment; shared by nano_banana and generate_prompt_json."""
+    global _DEFAULT_ROUTER
+    with _DEFAULT_LOCK:
+        if _DEFAULT_ROUTER is None:
+            defaults = dict(DEFAULT_MODELS, prompt=os.getenv("OPENROUTER_MODEL") or DEFAULT_MODELS["prompt"])
+            candidates = {
+                task: parse_candidates(os.getenv(f"{task.upper()}_MODELS", "")) or [(default, 1)]
+                for task, default in defaults.items()
+            }
+            max_tier = os.getenv("MODEL_MAX_TIER")
+            _DEFAULT_ROUTER = ModelRouter(
+                candidates,
+                max_tier=int(max_tier) if max_tier else None,
+                probe_interval=float(os.getenv("MODEL_PROBE_INTERVAL", "60")),
+            )
+        return _DEFAULT_ROUTER
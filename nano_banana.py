@@ -1,11 +1,269 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import math
 import mimetypes
 import os
-from google import genai
-from google.genai import types
+import re
+import threading
+import time
+from collections import deque
+
+from model_router import ModelRouter, default_router
+
+# google.genai is the slowest import in the game's startup path, so it is loaded on first use (see _load_sdk).
+genai = None
+types = None
 
 GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY")
 
 
+def _load_sdk():
+    global genai, types
+    if genai is None:
+        from google import genai as _genai
+        from google.genai import types as _types
+
+        # genai is what other threads test, so it is published last: once it is set, types is usable too.
+        types = _types
+        genai = _genai
+
+
+def warm_up():
+    """Import the GenAI SDK ahead of the first call, e.g. from a background thread while a menu is shown."""
+    _load_sdk()
+
+
+# How often a blocked call re-checks its cancel token and deadline, in seconds.
+_ABORT_POLL_INTERVAL = 0.05
+
+
+class CancelToken:
+    """
+    Thread-safe flag used to abort an in-flight ImageGenerator call.
+    A child token is cancelled whenever its parent is, so one round-level token can fan out to several calls.
+    """
+
+    def __init__(self, parent: "CancelToken" = None):
+        self._event = threading.Event()
+        self._parent = parent
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        return self._parent is not None and self._parent.cancelled
+
+    def child(self) -> "CancelToken":
+        return CancelToken(parent=self)
+
+
+class GenerationAborted:
+    """
+    Returned instead of a result when a call was cancelled or ran past its deadline.
+    Instances are falsy, so existing `if image_path:` style checks treat them like a failed generation.
+    """
+
+    CANCELLED = "cancelled"
+    TIMED_OUT = "timed_out"
+
+    def __init__(self, reason: str):
+        self.reason = reason
+
+    @property
+    def timed_out(self) -> bool:
+        return self.reason == self.TIMED_OUT
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return f"GenerationAborted({self.reason!r})"
+
+
+class _Aborted(Exception):
+    def __init__(self, result: GenerationAborted):
+        super().__init__(result.reason)
+        self.result = result
+
+
+def _check_abort(cancel_token: CancelToken = None, deadline: float = None) -> GenerationAborted | None:
+    if cancel_token is not None and cancel_token.cancelled:
+        return GenerationAborted(GenerationAborted.CANCELLED)
+    if deadline is not None and time.monotonic() >= deadline:
+        return GenerationAborted(GenerationAborted.TIMED_OUT)
+    return None
+
+
+async def _cancel_all(tasks):
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
+        try:
+            await task
+        except BaseException:
+            pass
+
+
+async def _guarded(coro, cancel_token: CancelToken = None, deadline: float = None):
+    """
+    Await coro while watching the cancel token and deadline; raises _Aborted as soon as either fires.
+    The inner task is cancelled on abort (and when the caller itself is cancelled), which closes the SDK
+    stream and releases its connection.
+    """
+    aborted = _check_abort(cancel_token, deadline)
+    if aborted is not None:
+        coro.close()
+        raise _Aborted(aborted)
+    if cancel_token is None and deadline is None:
+        return await coro
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            timeout = _ABORT_POLL_INTERVAL
+            if deadline is not None:
+                timeout = min(timeout, max(0.0, deadline - time.monotonic()))
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+            if done:
+                return task.result()
+            aborted = _check_abort(cancel_token, deadline)
+            if aborted is not None:
+                raise _Aborted(aborted)
+    finally:
+        if not task.done():
+            await _cancel_all([task])
+
+
+_LOOP = None
+_LOOP_LOCK = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    # One shared loop thread serves every blocking wrapper, so the sync API never needs a thread per call.
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="genai-loop", daemon=True).start()
+            _LOOP = loop
+        return _LOOP
+
+
+def _run_sync(coro):
+    """Run coro on the shared background loop and block until it finishes."""
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop()).result()
+
+
+def _http_options_for(deadline: float = None) -> types.HttpOptions | None:
+    # Bound the socket itself by the remaining time so an abandoned request does not linger.
+    if deadline is None:
+        return None
+    _load_sdk()
+    remaining_ms = int((deadline - time.monotonic()) * 1000)
+    return types.HttpOptions(timeout=max(1000, remaining_ms))
+
+
+class HedgePolicy:
+    """
+    Fires a second identical image request when the first has not produced an image within a latency percentile.
+    The first attempt to return an image wins and the other is cancelled. Hedges are capped at max_extra_ratio
+    of all requests, so the extra spend stays bounded. One policy can be shared across ImageGenerator instances
+    to keep latency history between rounds.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        min_delay: float = 2.0,
+        default_delay: float = 30.0,
+        max_extra_ratio: float = 0.1,
+        window: int = 50,
+        min_samples: int = 5,
+    ):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.default_delay = default_delay
+        self.max_extra_ratio = max_extra_ratio
+        self.min_samples = min_samples
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedges_fired = 0
+        self.hedges_won = 0
+
+    def hedge_delay(self) -> float:
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < self.min_samples:
+            return self.default_delay
+        index = min(len(samples) - 1, max(0, math.ceil(self.percentile * len(samples)) - 1))
+        return max(self.min_delay, samples[index])
+
+    def begin_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def acquire_hedge(self) -> bool:
+        with self._lock:
+            if self.hedges_fired >= self.max_extra_ratio * self.requests:
+                return False
+            self.hedges_fired += 1
+            return True
+
+    def record(self, latency: float, hedge_won: bool):
+        with self._lock:
+            self._latencies.append(latency)
+            if hedge_won:
+                self.hedges_won += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedges_fired": self.hedges_fired,
+                "hedges_won": self.hedges_won,
+                "hedge_win_rate": (self.hedges_won / self.hedges_fired) if self.hedges_fired else 0.0,
+            }
+
+
+class Level:
+    """
+    One generated level in an ImageGenerator's history chain.
+    params snapshots the prompt parameters and coordinates the level was generated with, so going back to it
+    also restores what the next rework starts from. data is an in-memory copy of the image bytes and may be
+    dropped under the memory budget; the file at path may be deleted under the disk budget.
+    """
+
+    def __init__(self, index: int, parent: int | None, kind: str, path: str, target, params: dict, data: bytes = None):
+        self.index = index
+        self.parent = parent
+        self.kind = kind  # "initial", "harder" or "easier"
+        self.path = path
+        self.target = target
+        self.params = params
+        self.data = data
+        self.size = len(data) if data is not None else _file_size(path)
+
+    @property
+    def on_disk(self) -> bool:
+        return os.path.exists(self.path)
+
+    @property
+    def available(self) -> bool:
+        return self.data is not None or self.on_disk
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
 class ImageGenerator:
 
     MAIN_PROMPT = """Seamlessly embed a subtly integrated figure, whose face is derived from the provided image, into a highly detailed, bustling crowd scene.
@@ -29,6 +287,12 @@ class ImageGenerator:
         "Only output JSON. No extra text. If uncertain, still provide best estimate."
     )
 
+    # Appended to generation prompts when embed_target is on, so one call returns both image and target.
+    TARGET_BOX_PROMPT = """
+After the image, also output the bounding box of the embedded face as STRICT JSON on a single line, in pixel
+coordinates of the final 768x1344 canvas (origin top-left): {"face_box": {"x0": 100, "y0": 200, "x1": 130, "y1": 236}}
+"""
+
     HARDER_LEVEL = """Rework the given image. Keep the following parameters:
 style: {style_prompt}
 scenery: {scenery}
@@ -64,8 +328,21 @@ Add fewer details, make the provided face slightly larger while ensuring it is w
         crowd_density: str = "high",
         color_palette: str = "vibrant",
         custom_image: str = None,
+        hedge_policy: HedgePolicy = None,
+        router: ModelRouter = None,
+        embed_target: bool = False,
+        history_memory_bytes: int = 64 * 2**20,
+        history_disk_bytes: int = 256 * 2**20,
     ):
-        self.client = genai.Client(api_key=GOOGLE_API_KEY)
+        # Created on first use so constructing a generator never blocks on the SDK import.
+        self._client = None
+        self.hedge_policy = hedge_policy
+        # Picks the image/detection model per call from rolling latency and error rates.
+        self.router = router or default_router()
+        # When set, generation also asks for the face box; reported_target holds its center (or None) after each call.
+        self.embed_target = embed_target
+        self.reported_target = None
+        self.aio = _AsyncImageGenerator(self)
         self._old_coords_x, self._old_coords_y = None, None
         self.coords_x, self.coords_y = None, None
         self.style = style
@@ -79,6 +356,43 @@ Add fewer details, make the provided face slightly larger while ensuring it is w
         self.y_cord = y_cords
         self.level = 1
         self._current_level_image = None
+        # Every generated level, indexed by Level.index; goto_level() jumps back to any of them without a model call.
+        self.levels: list[Level] = []
+        self.current_level = None
+        self.history_memory_bytes = history_memory_bytes
+        self.history_disk_bytes = history_disk_bytes
+        self._last_image_data = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            _load_sdk()
+            self._client = genai.Client(api_key=GOOGLE_API_KEY)
+        return self._client
+
+    @staticmethod
+    def _parse_json_object(text: str) -> dict:
+        # Extract JSON block if there is any stray text
+        match = re.search(r"\{.*\}", text, re.DOTALL)
+        if match:
+            text = match.group(0)
+        return json.loads(text)
+
+    @classmethod
+    def _parse_target_box(cls, text: str) -> tuple[int, int] | None:
+        """Center of the "face_box" reported in text, or None if missing or implausible for the canvas."""
+        try:
+            box = cls._parse_json_object(text).get("face_box") or {}
+            x0, y0, x1, y1 = (int(box[k]) for k in ("x0", "y0", "x1", "y1"))
+        except Exception:
+            return None
+        width, height = x1 - x0, y1 - y0
+        if x0 < 0 or y0 < 0 or x1 > 768 or y1 > 1344:
+            return None
+        # A face is neither a speck nor a large share of a crowded scene.
+        if not (6 <= width <= 384 and 6 <= height <= 672):
+            return None
+        return ((x0 + x1) // 2, (y0 + y1) // 2)
 
     @staticmethod
     def save_binary_file(file_name, data):
@@ -87,29 +401,215 @@ Add fewer details, make the provided face slightly larger while ensuring it is w
         f.close()
         print(f"File saved to to: {file_name}")
 
-    def generate_initial(self):
+    def generate_initial(self, cancel_token: CancelToken = None, deadline: float = None):
+        """
+        Generate the first level. deadline is an absolute time.monotonic() value.
+        Returns the image path, or a GenerationAborted if cancelled/timed out (current level is left untouched).
+        Blocking wrapper around `await self.aio.generate_initial()`.
+        """
+        return _run_sync(self.aio.generate_initial(cancel_token=cancel_token, deadline=deadline))
 
-        prompt = self.MAIN_PROMPT.format(
-            x_cord=self.x_cord,
-            y_cord=self.y_cord,
-            style_prompt=self.style,
-            scenery=self.scenery,
-            world_settings=self.world_settings,
-            level_of_detail=self.level_of_detail,
-            crowd_density=self.crowd_density,
-            color_palette=self.color_palette,
+    def make_harder(self, x_cord_new, y_cord_new, cancel_token: CancelToken = None, deadline: float = None):
+        return _run_sync(self.aio.make_harder(x_cord_new, y_cord_new, cancel_token=cancel_token, deadline=deadline))
+
+    def make_easier(self, x_cord_new, y_cord_new, cancel_token: CancelToken = None, deadline: float = None):
+        return _run_sync(self.aio.make_easier(x_cord_new, y_cord_new, cancel_token=cancel_token, deadline=deadline))
+
+    def detect_face_center(
+        self,
+        generated_image_path: str,
+        reference_image_path: str,
+        cancel_token: CancelToken = None,
+        deadline: float = None,
+    ) -> tuple[int, int] | GenerationAborted | None:
+        """
+        Ask the model to locate the reference face within the generated image and return center (x, y) in 768x1344 space.
+        Returns None if detection fails, or a GenerationAborted if cancelled/timed out.
+        """
+        return _run_sync(
+            self.aio.detect_face_center(
+                generated_image_path, reference_image_path, cancel_token=cancel_token, deadline=deadline
+            )
         )
-        self._current_level_image = self._generate(
-            prompt=prompt,
-            custom_images=[self.custom_image] if self.custom_image else [],
+
+    def goto_level(self, index: int) -> str | None:
+        """
+        Make an earlier level current again: its image, target and prompt parameters are restored, and the next
+        make_harder/make_easier branches from it. Returns the image path, or None if the level is unknown or
+        its image was evicted from both memory and disk.
+        """
+        if not 0 <= index < len(self.levels):
+            return None
+        level = self.levels[index]
+        if not level.on_disk:
+            if level.data is None:
+                return None
+            self.save_binary_file(level.path, level.data)
+        params = level.params
+        self.x_cord, self.y_cord = params["x_cord"], params["y_cord"]
+        self._old_coords_x, self._old_coords_y = params["old_x"], params["old_y"]
+        for name in ("style", "scenery", "world_settings", "level_of_detail", "crowd_density", "color_palette"):
+            setattr(self, name, params[name])
+        self._current_level_image = level.path
+        self.current_level = index
+        self._enforce_history_budget()
+        return level.path
+
+    def set_level_target(self, target, index: int = None):
+        """Record the located target of a level (the current one by default) so goto_level() can return it."""
+        index = self.current_level if index is None else index
+        if index is not None:
+            self.levels[index].target = target
+
+    def level_target(self, index: int = None):
+        index = self.current_level if index is None else index
+        return None if index is None else self.levels[index].target
+
+    def parent_level(self, index: int = None) -> int | None:
+        index = self.current_level if index is None else index
+        return None if index is None else self.levels[index].parent
+
+    def cached_image_bytes(self) -> int:
+        """Bytes held by in-memory copies of level images."""
+        return sum(len(level.data) for level in self.levels if level.data is not None)
+
+    def release_cached_images(self) -> int:
+        """Drop in-memory copies of levels whose file is on disk (goto_level reads the file); returns bytes freed."""
+        freed = 0
+        for level in self.levels:
+            if level.data is not None and level.on_disk:
+                freed += len(level.data)
+                level.data = None
+        return freed
+
+    def to_state(self) -> dict:
+        """JSON-serialisable snapshot of the prompt parameters, coordinates and level chain (image bytes stay on disk)."""
+        return {
+            "x_cord": self.x_cord,
+            "y_cord": self.y_cord,
+            "old_x": self._old_coords_x,
+            "old_y": self._old_coords_y,
+            "style": self.style,
+            "scenery": self.scenery,
+            "world_settings": self.world_settings,
+            "level_of_detail": self.level_of_detail,
+            "crowd_density": self.crowd_density,
+            "color_palette": self.color_palette,
+            "custom_image": self.custom_image,
+            "current_level": self.current_level,
+            "levels": [
+                {
+                    "index": level.index,
+                    "parent": level.parent,
+                    "kind": level.kind,
+                    "path": os.path.abspath(level.path),
+                    "target": list(level.target) if level.target is not None else None,
+                    "params": level.params,
+                }
+                for level in self.levels
+            ],
+        }
+
+    @classmethod
+    def from_state(cls, state: dict, **kwargs) -> ImageGenerator:
+        """Rebuild a generator from to_state(); kwargs are passed to the constructor (hedge_policy, router, ...)."""
+        g = cls(
+            state["x_cord"],
+            state["y_cord"],
+            style=state["style"],
+            scenery=state["scenery"],
+            world_settings=state["world_settings"],
+            level_of_detail=state["level_of_detail"],
+            crowd_density=state["crowd_density"],
+            color_palette=state["color_palette"],
+            custom_image=state.get("custom_image"),
+            **kwargs,
         )
+        g._old_coords_x, g._old_coords_y = state.get("old_x"), state.get("old_y")
+        for entry in state.get("levels", []):
+            target = entry.get("target")
+            g.levels.append(
+                Level(
+                    index=entry["index"],
+                    parent=entry["parent"],
+                    kind=entry["kind"],
+                    path=entry["path"],
+                    target=tuple(target) if target is not None else None,
+                    params=entry["params"],
+                )
+            )
+        g.current_level = state.get("current_level")
+        if g.current_level is not None:
+            g._current_level_image = g.levels[g.current_level].path
+        return g
 
-    def make_harder(self, x_cord_new, y_cord_new):
-        prompt = self.HARDER_LEVEL.format(
+    def _record_level(self, path: str, kind: str, parent: int | None):
+        level = Level(
+            index=len(self.levels),
+            parent=parent,
+            kind=kind,
+            path=path,
+            target=self.reported_target or (self.x_cord, self.y_cord),
+            params={
+                "x_cord": self.x_cord,
+                "y_cord": self.y_cord,
+                "old_x": self._old_coords_x,
+                "old_y": self._old_coords_y,
+                "style": self.style,
+                "scenery": self.scenery,
+                "world_settings": self.world_settings,
+                "level_of_detail": self.level_of_detail,
+                "crowd_density": self.crowd_density,
+                "color_palette": self.color_palette,
+            },
+            data=self._last_image_data,
+        )
+        self._last_image_data = None
+        self.levels.append(level)
+        self.current_level = level.index
+        self._enforce_history_budget()
+
+    def _enforce_history_budget(self):
+        """
+        Drop in-memory copies, then level files, least valuable first, until both budgets hold.
+        The current level and its ancestors (the Back path) are kept longest; level 0 keeps its file because
+        ENTER_FILE_NAME_0 doubles as the game's fallback asset.
+        """
+        lineage = []
+        index = self.current_level
+        while index is not None:
+            lineage.append(index)
+            index = self.levels[index].parent
+
+        def value(level: Level):
+            # Off-lineage levels go first (oldest first), then ancestors from the root down.
+            if level.index in lineage:
+                return (1, -lineage.index(level.index))
+            return (0, level.index)
+
+        candidates = sorted((lv for lv in self.levels if lv.index != self.current_level), key=value)
+        in_memory = sum(len(lv.data) for lv in self.levels if lv.data is not None)
+        for level in candidates:
+            if in_memory <= self.history_memory_bytes:
+                break
+            if level.data is not None:
+                in_memory -= len(level.data)
+                level.data = None
+        on_disk = sum(lv.size for lv in self.levels if lv.on_disk)
+        for level in candidates:
+            if on_disk <= self.history_disk_bytes:
+                break
+            if level.index != 0 and level.on_disk:
+                try:
+                    os.remove(level.path)
+                    on_disk -= level.size
+                except OSError:
+                    pass
+
+    def _initial_prompt(self) -> str:
+        return self.MAIN_PROMPT.format(
             x_cord=self.x_cord,
             y_cord=self.y_cord,
-            x_cord_new=x_cord_new,
-            y_cord_new=y_cord_new,
             style_prompt=self.style,
             scenery=self.scenery,
             world_settings=self.world_settings,
@@ -117,17 +617,9 @@ Add fewer details, make the provided face slightly larger while ensuring it is w
             crowd_density=self.crowd_density,
             color_palette=self.color_palette,
         )
-        images = (
-            [self._current_level_image] + [self.custom_image]
-            if self.custom_image
-            else [self._current_level_image]
-        )
-        self._current_level_image = self._generate(prompt=prompt, custom_images=images)
-        self._old_coords_x, self._old_coords_y = self.x_cord, self.y_cord
-        self.x_cord, self.y_cord = x_cord_new, y_cord_new
 
-    def make_easier(self, x_cord_new, y_cord_new):
-        prompt = self.EASIER_LEVEL.format(
+    def _rework_prompt(self, template: str, x_cord_new, y_cord_new) -> str:
+        return template.format(
             x_cord=self.x_cord,
             y_cord=self.y_cord,
             x_cord_new=x_cord_new,
@@ -139,24 +631,38 @@ Add fewer details, make the provided face slightly larger while ensuring it is w
             crowd_density=self.crowd_density,
             color_palette=self.color_palette,
         )
-        images = (
+
+    def _rework_images(self) -> list[str]:
+        return (
             [self._current_level_image] + [self.custom_image]
             if self.custom_image
             else [self._current_level_image]
         )
-        self._current_level_image = self._generate(prompt=prompt, custom_images=images)
+
+    def _advance(self, result, x_cord_new, y_cord_new, kind: str):
+        # Aborted or no image in the stream: the current level stays as it was.
+        if result is None or isinstance(result, GenerationAborted):
+            return result
+        parent = self.current_level
+        self._current_level_image = result
         self._old_coords_x, self._old_coords_y = self.x_cord, self.y_cord
         self.x_cord, self.y_cord = x_cord_new, y_cord_new
+        self._record_level(result, kind, parent)
+        return result
 
-    def _generate(
+    async def _generate(
         self,
         custom_images: list[str] = None,
         prompt: str = None,
         file_name: str = "ENTER_FILE_NAME_{file_index}",
+        cancel_token: CancelToken = None,
+        deadline: float = None,
     ):
-        client = genai.Client(
-            api_key=GOOGLE_API_KEY,
-        )
+        _load_sdk()
+        client = self.client
+        self.reported_target = None
+        if self.embed_target:
+            prompt = prompt + self.TARGET_BOX_PROMPT
         parts = [
             types.Part.from_text(text=prompt),
         ]
@@ -169,7 +675,7 @@ Add fewer details, make the provided face slightly larger while ensuring it is w
                             data=image_file.read(),
                         ),
                     )
-        model = "gemini-2.5-flash-image-preview"
+        model = self.router.choose("image")
         contents = [
             types.Content(
                 role="user",
@@ -181,46 +687,142 @@ Add fewer details, make the provided face slightly larger while ensuring it is w
                 "IMAGE",
                 "TEXT",
             ],
+            http_options=_http_options_for(deadline),
         )
 
-        file_index = 0
-        for chunk in client.models.generate_content_stream(
-            model=model,
-            contents=contents,
-            config=generate_content_config,
-        ):
-            if (
-                chunk.candidates is None
-                or chunk.candidates[0].content is None
-                or chunk.candidates[0].content.parts is None
-            ):
-                continue
-            if (
-                chunk.candidates[0].content.parts[0].inline_data
-                and chunk.candidates[0].content.parts[0].inline_data.data
-            ):
-                file_name = file_name.format(file_index=file_index)
-                file_index += 1
-                inline_data = chunk.candidates[0].content.parts[0].inline_data
-                data_buffer = inline_data.data
-                file_extension = mimetypes.guess_extension(inline_data.mime_type)
-                self.save_binary_file(f"{file_name}{file_extension}", data_buffer)
-                return f"{file_name}{file_extension}"
+        def attempt():
+            return self._consume_stream(
+                lambda: client.aio.models.generate_content_stream(
+                    model=model,
+                    contents=contents,
+                    config=generate_content_config,
+                )
+            )
+
+        started = time.monotonic()
+        try:
+            if self.hedge_policy is None:
+                image = await _guarded(attempt(), cancel_token, deadline)
             else:
-                print(chunk.text)
+                image = await _guarded(self._hedged(attempt), cancel_token, deadline)
+        except _Aborted as e:
+            print(f"[_generate] {e.result.reason}")
+            if e.result.timed_out:
+                self.router.record("image", model, time.monotonic() - started, ok=False)
+            return e.result
+        except Exception:
+            self.router.record("image", model, time.monotonic() - started, ok=False)
+            raise
+        self.router.record("image", model, time.monotonic() - started, ok=image is not None)
+        if image is None:
+            return None
+        data_buffer, mime_type, text = image
+        if self.embed_target:
+            self.reported_target = self._parse_target_box(text)
+            print(f"[_generate] reported target: {self.reported_target}")
+        # One file per level, so earlier levels stay on disk for goto_level().
+        file_name = file_name.format(file_index=len(self.levels))
+        file_extension = mimetypes.guess_extension(mime_type)
+        self.save_binary_file(f"{file_name}{file_extension}", data_buffer)
+        self._last_image_data = data_buffer
+        return f"{file_name}{file_extension}"
 
-    def detect_face_center(self, generated_image_path: str, reference_image_path: str) -> tuple[int, int] | None:
+    async def _hedged(self, attempt):
         """
-        Ask the model to locate the reference face within the generated image and return center (x, y) in 768x1344 space.
-        Returns None if detection fails.
+        Run attempt() under the hedge policy: start one attempt, and if it has not produced an image after
+        hedge_delay() start an identical one. Returns the first image; the loser is cancelled.
+        """
+        policy = self.hedge_policy
+        policy.begin_request()
+        attempt_index = {}
+
+        def launch(index: int) -> asyncio.Task:
+            task = asyncio.ensure_future(attempt())
+            attempt_index[task] = index
+            return task
+
+        # Latency is what the caller waited, from the first launch, also when the hedge wins; measuring from the
+        # hedge's own start would drag the percentile down and make later hedges fire earlier.
+        requested_at = time.monotonic()
+        pending = {launch(0)}
+        hedge_at = requested_at + policy.hedge_delay()
+        last_error = None
+        try:
+            while pending:
+                timeout = None if hedge_at is None else max(0.0, hedge_at - time.monotonic())
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedge_at = None
+                    if policy.acquire_hedge():
+                        print("[_generate] first request is slow; firing hedge")
+                        pending.add(launch(1))
+                    continue
+                for task in done:
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        continue
+                    image = task.result()
+                    if image is not None:
+                        policy.record(time.monotonic() - requested_at, hedge_won=attempt_index[task] == 1)
+                        return image
+        finally:
+            await _cancel_all(pending)
+        if last_error is not None:
+            raise last_error
+        return None
+
+    async def _consume_stream(self, stream_factory):
+        """
+        Read the response stream; returns (data, mime_type, text) or None if no image arrived.
+        Stops at the first inline image unless embed_target is set, in which case the rest of the stream is
+        read too so the target box that follows the image is captured.
         """
+        stream = await stream_factory()
+        image = None
+        texts = []
         try:
+            async for chunk in stream:
+                if (
+                    chunk.candidates is None
+                    or chunk.candidates[0].content is None
+                    or chunk.candidates[0].content.parts is None
+                ):
+                    continue
+                for part in chunk.candidates[0].content.parts:
+                    if image is None and part.inline_data and part.inline_data.data:
+                        image = (part.inline_data.data, part.inline_data.mime_type)
+                    elif part.text:
+                        texts.append(part.text)
+                if image is not None and not self.embed_target:
+                    break
+        finally:
+            # Closing the SDK stream releases the underlying HTTP connection, also when cancelled mid-stream.
+            aclose = getattr(stream, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        text = "".join(texts)
+        if text:
+            print(text)
+        if image is None:
+            return None
+        return image + (text,)
+
+    async def _detect_face_center(
+        self,
+        generated_image_path: str,
+        reference_image_path: str,
+        cancel_token: CancelToken = None,
+        deadline: float = None,
+    ):
+        model, started = None, None
+        try:
+            _load_sdk()
+            client = self.client
             parts = []
             # Order: explain task, attach images, ask for JSON only
             parts.append(types.Part.from_text(text=self.FACE_LOCATE_PROMPT))
-            import mimetypes as _mt
             with open(generated_image_path, "rb") as gen_f:
-                g_mime = _mt.guess_type(generated_image_path)[0] or "image/png"
+                g_mime = mimetypes.guess_type(generated_image_path)[0] or "image/png"
                 parts.append(
                     types.Part.from_bytes(
                         mime_type=g_mime,
@@ -228,7 +830,7 @@ Add fewer details, make the provided face slightly larger while ensuring it is w
                     )
                 )
             with open(reference_image_path, "rb") as ref_f:
-                r_mime = _mt.guess_type(reference_image_path)[0] or "image/png"
+                r_mime = mimetypes.guess_type(reference_image_path)[0] or "image/png"
                 parts.append(
                     types.Part.from_bytes(
                         mime_type=r_mime,
@@ -238,27 +840,95 @@ Add fewer details, make the provided face slightly larger while ensuring it is w
 
             contents = [types.Content(role="user", parts=parts)]
             # Use a text-capable model for analysis
-            model = "gemini-1.5-flash"
-            cfg = types.GenerateContentConfig(response_modalities=["TEXT"], temperature=0.1)
-            resp = self.client.models.generate_content(model=model, contents=contents, config=cfg)
-            text = (resp.text or "").strip()
-            # Extract JSON block if there is any stray text
-            import json, re
-            match = re.search(r"\{.*\}", text, re.DOTALL)
-            if match:
-                text = match.group(0)
-            data = json.loads(text)
+            model = self.router.choose("detection")
+            cfg = types.GenerateContentConfig(
+                response_modalities=["TEXT"], temperature=0.1, http_options=_http_options_for(deadline)
+            )
+            started = time.monotonic()
+            resp = await _guarded(
+                client.aio.models.generate_content(model=model, contents=contents, config=cfg),
+                cancel_token,
+                deadline,
+            )
+            data = self._parse_json_object((resp.text or "").strip())
             c = data.get("center") or {}
             x = int(c.get("x"))
             y = int(c.get("y"))
             # Clamp to base canvas
             x = max(0, min(767, x))
             y = max(0, min(1343, y))
+            self.router.record("detection", model, time.monotonic() - started, ok=True)
             return (x, y)
+        except _Aborted as e:
+            print("[detect_face_center]", e.result.reason)
+            if e.result.timed_out and started is not None:
+                self.router.record("detection", model, time.monotonic() - started, ok=False)
+            return e.result
         except Exception as e:
             print("[detect_face_center] failed:", e)
+            if started is not None:
+                self.router.record("detection", model, time.monotonic() - started, ok=False)
             return None
 
 
+class _AsyncImageGenerator:
+    """
+    Async counterparts of the ImageGenerator operations, reached through `generator.aio` (mirrors the SDK's
+    `client.aio`). They share the generator's state (levels, coordinates, prompt parameters).
+    A generator's GenAI client binds its connections to the first event loop it runs on, and the blocking methods
+    always run on the shared background loop. So drive a given generator either through the blocking methods or
+    through `aio` on a single loop of your own; do not mix the two.
+    """
+
+    def __init__(self, generator: ImageGenerator):
+        self._generator = generator
+
+    async def generate_initial(self, cancel_token: CancelToken = None, deadline: float = None):
+        g = self._generator
+        result = await g._generate(
+            prompt=g._initial_prompt(),
+            custom_images=[g.custom_image] if g.custom_image else [],
+            cancel_token=cancel_token,
+            deadline=deadline,
+        )
+        if isinstance(result, GenerationAborted):
+            return result
+        g._current_level_image = result
+        if result is not None:
+            g._record_level(result, "initial", parent=None)
+        return result
+
+    async def make_harder(self, x_cord_new, y_cord_new, cancel_token: CancelToken = None, deadline: float = None):
+        g = self._generator
+        result = await g._generate(
+            prompt=g._rework_prompt(g.HARDER_LEVEL, x_cord_new, y_cord_new),
+            custom_images=g._rework_images(),
+            cancel_token=cancel_token,
+            deadline=deadline,
+        )
+        return g._advance(result, x_cord_new, y_cord_new, "harder")
+
+    async def make_easier(self, x_cord_new, y_cord_new, cancel_token: CancelToken = None, deadline: float = None):
+        g = self._generator
+        result = await g._generate(
+            prompt=g._rework_prompt(g.EASIER_LEVEL, x_cord_new, y_cord_new),
+            custom_images=g._rework_images(),
+            cancel_token=cancel_token,
+            deadline=deadline,
+        )
+        return g._advance(result, x_cord_new, y_cord_new, "easier")
+
+    async def detect_face_center(
+        self,
+        generated_image_path: str,
+        reference_image_path: str,
+        cancel_token: CancelToken = None,
+        deadline: float = None,
+    ) -> tuple[int, int] | GenerationAborted | None:
+        return await self._generator._detect_face_center(
+            generated_image_path, reference_image_path, cancel_token=cancel_token, deadline=deadline
+        )
+
+
 # if __name__ == "__main__":
 #     generate()
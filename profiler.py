@@ -0,0 +1,179 @@
+"""
+Built-in sampling profiler and frame timer for diagnosing stutter in the field, where no external tools can
+be attached.
+
+SamplingProfiler wakes every `interval` seconds on a daemon thread, reads every thread's current stack via
+sys._current_frames() and counts identical stacks. The result is written in the collapsed-stack format
+("thread;outer;...;inner count" per line) that flamegraph.pl, speedscope and inferno read directly.
+
+FrameTimer splits each frame of Game.run into event handling, draw and flip, keeps a rolling window for the
+live FPS / 1%-low overlay, and writes a frame-time histogram with percentiles per phase. Both are accumulated
+per frame into fixed buckets, so a profiling session that runs for days does not grow with the frame count.
+
+Game toggles a Profiler (both of the above) with F9, or from launch with KALLY_PROFILE=1. Files go to
+KALLY_PROFILE_DIR (default: the working directory) when profiling stops.
+"""
+
+import bisect
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Optional
+
+# Frame-time histogram bucket upper bounds in milliseconds; the last bucket is open-ended.
+HISTOGRAM_BUCKETS_MS = (4.0, 8.0, 12.0, 16.7, 20.0, 25.0, 33.3, 50.0, 100.0, 250.0)
+# Percentiles are read from counts of frame times rounded down to this step; the maximum is kept exactly.
+PERCENTILE_STEP_MS = 0.1
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                self.samples[";".join(reversed(stack))] += 1
+            self.sample_count += 1
+
+    def write_collapsed(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class FrameTimer:
+    PHASES = ("events", "draw", "flip")
+
+    def __init__(self, window: int = 600):
+        self.recent = deque(maxlen=window)  # frame intervals (s) for the live overlay
+        self.frame_count = 0
+        columns = 1 + len(self.PHASES)  # frame interval, then one per phase
+        self._buckets = [[0] * (len(HISTOGRAM_BUCKETS_MS) + 1) for _ in range(columns)]
+        self._steps = [Counter() for _ in range(columns)]  # PERCENTILE_STEP_MS index -> frames
+        self._max = [0.0] * columns
+        self._frame_start = None
+        self._mark = None
+        self._phases = {}
+
+    def begin_frame(self):
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            interval = now - self._frame_start
+            self.recent.append(interval)
+            self._add_frame((interval,) + tuple(self._phases.get(p, 0.0) for p in self.PHASES))
+        self._frame_start = self._mark = now
+        self._phases = {}
+
+    def _add_frame(self, times):
+        self.frame_count += 1
+        for i, seconds in enumerate(times):
+            ms = seconds * 1000
+            self._buckets[i][bisect.bisect_right(HISTOGRAM_BUCKETS_MS, ms)] += 1
+            self._steps[i][int(ms / PERCENTILE_STEP_MS)] += 1
+            self._max[i] = max(self._max[i], ms)
+
+    def percentile_ms(self, column: int, pct: int) -> float:
+        """pct-th percentile of column (0 = frame interval, then PHASES), PERCENTILE_STEP_MS resolution."""
+        if self.frame_count == 0:
+            return 0.0
+        if pct >= 100:
+            return self._max[column]
+        rank = min(self.frame_count - 1, self.frame_count * pct // 100)
+        seen = 0
+        for step in sorted(self._steps[column]):
+            seen += self._steps[column][step]
+            if seen > rank:
+                return step * PERCENTILE_STEP_MS
+        return self._max[column]
+
+    def mark(self, phase: str):
+        """Attribute the time since the previous mark (or frame start) to phase."""
+        if self._mark is None:
+            return  # started mid-frame (e.g. F9); timing begins with the next begin_frame()
+        now = time.perf_counter()
+        self._phases[phase] = self._phases.get(phase, 0.0) + (now - self._mark)
+        self._mark = now
+
+    def fps(self) -> float:
+        if not self.recent:
+            return 0.0
+        return len(self.recent) / sum(self.recent)
+
+    def low_1pct_fps(self) -> float:
+        """FPS over the slowest 1% of recent frames (at least one frame)."""
+        if not self.recent:
+            return 0.0
+        worst = sorted(self.recent, reverse=True)[: max(1, len(self.recent) // 100)]
+        return len(worst) / sum(worst)
+
+    def write_histogram(self, path: str):
+        columns = ("frame",) + self.PHASES
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"frames: {self.frame_count}\n\n")
+            f.write(f"{'bucket (ms)':>14}" + "".join(f"{c:>10}" for c in columns) + "\n")
+            lower = 0.0
+            for b, upper in enumerate(HISTOGRAM_BUCKETS_MS + (float("inf"),)):
+                counts = [self._buckets[i][b] for i in range(len(columns))]
+                label = f"{lower:g}-{upper:g}" if upper != float("inf") else f">={lower:g}"
+                f.write(f"{label:>14}" + "".join(f"{c:>10}" for c in counts) + "\n")
+                lower = upper
+            f.write("\npercentiles (ms)\n")
+            f.write(f"{'':>14}" + "".join(f"{c:>10}" for c in columns) + "\n")
+            for pct in (50, 90, 99, 100):
+                row = [f"{self.percentile_ms(i, pct):10.2f}" for i in range(len(columns))]
+                f.write(f"{'p' + str(pct) if pct < 100 else 'max':>14}" + "".join(row) + "\n")
+
+
+class Profiler:
+    """One profiling session: sampling profiler plus frame timer, written to disk on stop()."""
+
+    def __init__(self, out_dir: Optional[str] = None, interval: float = 0.005):
+        self.out_dir = out_dir or os.getenv("KALLY_PROFILE_DIR") or os.getcwd()
+        self.sampler = SamplingProfiler(interval=interval)
+        self.frames = FrameTimer()
+        self.started_at = time.strftime("%Y%m%d-%H%M%S")
+
+    def start(self):
+        self.sampler.start()
+        print(f"[Profile] started (sampling every {self.sampler.interval * 1000:.0f} ms)")
+
+    def stop(self) -> tuple:
+        """Stop sampling and write both reports; returns (collapsed stack path, histogram path)."""
+        self.sampler.stop()
+        os.makedirs(self.out_dir, exist_ok=True)
+        stacks = os.path.join(self.out_dir, f"kally-profile-{self.started_at}.collapsed")
+        histogram = os.path.join(self.out_dir, f"kally-frames-{self.started_at}.txt")
+        self.sampler.write_collapsed(stacks)
+        self.frames.write_histogram(histogram)
+        print(
+            f"[Profile] {self.sampler.sample_count} samples, {self.frames.frame_count} frames -> {stacks}, {histogram}"
+        )
+        return stacks, histogram
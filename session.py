@@ -0,0 +1,71 @@
+"""
+Warm session resume across restarts.
+
+The game snapshots its session to a small JSON file while playing (at most every SESSION_SAVE_INTERVAL_S seconds
+after a change) and on exit. On the next launch, Start Game serves the saved round straight from the level
+image on disk and rebuilds the ImageGenerator from its snapshot (ImageGenerator.to_state()), so Easier, Harder
+and Back keep working without a cold generation.
+
+Snapshot layout:
+    {"version": 1, "saved_at": <unix time>,
+     "round": {"prompt_json", "seed", "image_path", "target", "tolerance", "custom_image"},
+     "generator": <ImageGenerator.to_state()> or null}
+
+  KALLY_SESSION_FILE  path of the snapshot (default .kally_session.json next to game.py); set it empty to disable
+"""
+
+import json
+import os
+import time
+import traceback
+from typing import Optional
+
+SESSION_VERSION = 1
+SESSION_SAVE_INTERVAL_S = 10.0
+DEFAULT_SESSION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".kally_session.json")
+
+
+def session_path() -> Optional[str]:
+    path = os.getenv("KALLY_SESSION_FILE", DEFAULT_SESSION_FILE)
+    return path or None
+
+
+def save_session(round_state: dict, generator_state: Optional[dict], path: Optional[str] = None) -> bool:
+    """Write the snapshot atomically (temp file + rename) so a crash mid-write never leaves a torn file."""
+    path = path or session_path()
+    if path is None:
+        return False
+    snapshot = {
+        "version": SESSION_VERSION,
+        "saved_at": time.time(),
+        "round": round_state,
+        "generator": generator_state,
+    }
+    tmp = f"{path}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp, path)
+        return True
+    except Exception:
+        traceback.print_exc()
+        return False
+
+
+def load_session(path: Optional[str] = None) -> Optional[dict]:
+    """The saved snapshot, or None if there is none, it is from another version, or its image is gone."""
+    path = path or session_path()
+    if path is None or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except Exception as e:
+        print(f"[Session] ignoring unreadable session file {path}: {e}")
+        return None
+    if snapshot.get("version") != SESSION_VERSION:
+        return None
+    image_path = (snapshot.get("round") or {}).get("image_path")
+    if not (image_path and os.path.exists(image_path)):
+        return None
+    return snapshot
@@ -0,0 +1,12 @@
+import os
+import sys
+
+# game reads these at import time: a headless display, no saved session, no profiler and in-process generation.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+os.environ["KALLY_SESSION_FILE"] = ""
+os.environ["KALLY_PROFILE"] = ""
+os.environ["GENERATION_WORKER"] = "0"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
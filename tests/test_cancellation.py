@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace as NS
+
+import pytest
+
+import nano_banana
+from nano_banana import CancelToken, GenerationAborted, _Aborted, _guarded
+
+
+async def _slow(events, seconds=10.0):
+    events.append("started")
+    try:
+        await asyncio.sleep(seconds)
+        return "done"
+    except asyncio.CancelledError:
+        events.append("cancelled")
+        raise
+
+
+def test_guarded_returns_result_when_nothing_fires():
+    events = []
+    token = CancelToken()
+    assert asyncio.run(_guarded(_slow(events, 0.01), token, time.monotonic() + 5)) == "done"
+    assert events == ["started"]
+
+
+def test_guarded_cancel_aborts_and_cancels_inner_task():
+    events = []
+    token = CancelToken()
+    threading.Timer(0.1, token.cancel).start()
+    started = time.monotonic()
+    with pytest.raises(_Aborted) as exc_info:
+        asyncio.run(_guarded(_slow(events), token))
+    assert exc_info.value.result.reason == GenerationAborted.CANCELLED
+    assert time.monotonic() - started < 2.0
+    assert events == ["started", "cancelled"]
+
+
+def test_guarded_deadline_aborts_as_timed_out():
+    events = []
+    with pytest.raises(_Aborted) as exc_info:
+        asyncio.run(_guarded(_slow(events), deadline=time.monotonic() + 0.1))
+    assert exc_info.value.result.timed_out
+    assert events == ["started", "cancelled"]
+
+
+def test_guarded_cancelled_parent_token_never_starts_the_call():
+    events = []
+    parent = CancelToken()
+    parent.cancel()
+    with pytest.raises(_Aborted):
+        asyncio.run(_guarded(_slow(events), parent.child()))
+    assert events == []
+
+
+class HangingModels:
+    async def generate_content_stream(self, **kwargs):
+        async def stream():
+            await asyncio.sleep(3600)
+            yield None
+
+        return stream()
+
+
+def test_generate_initial_returns_aborted_and_records_no_level(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    generator = nano_banana.ImageGenerator(100, 200)
+    generator._client = NS(aio=NS(models=HangingModels()))
+    result = generator.generate_initial(deadline=time.monotonic() + 0.1)
+    assert isinstance(result, GenerationAborted) and result.timed_out
+    assert not result
+    assert generator.levels == [] and generator.current_level is None
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,28 @@
+import game
+from nano_banana import GenerationAborted
+
+
+def test_cancelled_half_open_probe_allows_another_probe():
+    breaker = game.CircuitBreaker("test", failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert breaker.state == breaker.HALF_OPEN
+
+    game.record_outcome(breaker, GenerationAborted(GenerationAborted.CANCELLED))
+
+    assert breaker.state == breaker.OPEN
+    assert breaker.allow()
+    game.record_outcome(breaker, "image.png")
+    assert breaker.state == breaker.CLOSED
+
+
+def test_timed_out_probe_reopens():
+    breaker = game.CircuitBreaker("test", failure_threshold=1, reset_timeout=60.0)
+    breaker.record_failure()
+    breaker.opened_at -= 60.0
+    assert breaker.allow()
+
+    game.record_outcome(breaker, GenerationAborted(GenerationAborted.TIMED_OUT))
+
+    assert breaker.state == breaker.OPEN
+    assert not breaker.allow()
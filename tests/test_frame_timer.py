@@ -0,0 +1,40 @@
+import random
+
+import pytest
+
+from profiler import FrameTimer
+
+
+def test_histogram_and_percentiles_match_the_recorded_frames(tmp_path):
+    rng = random.Random(1)
+    timer = FrameTimer()
+    frames = [tuple(rng.uniform(0.0005, 0.06) for _ in range(4)) for _ in range(5000)]
+    for times in frames:
+        timer._add_frame(times)
+
+    assert timer.frame_count == len(frames)
+    for column in range(4):
+        values = sorted(times[column] * 1000 for times in frames)
+        for pct in (50, 90, 99):
+            exact = values[min(len(values) - 1, len(values) * pct // 100)]
+            assert timer.percentile_ms(column, pct) == pytest.approx(exact, abs=0.1)
+        assert timer.percentile_ms(column, 100) == pytest.approx(values[-1])
+
+    path = tmp_path / "frames.txt"
+    timer.write_histogram(str(path))
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert lines[0] == "frames: 5000"
+    bucket_rows = lines[3 : lines.index("percentiles (ms)") - 1]
+    for column in range(4):
+        assert sum(int(row.split()[1 + column]) for row in bucket_rows) == 5000
+    exact_4_to_8 = sum(1 for times in frames if 4.0 <= times[0] * 1000 < 8.0)
+    assert bucket_rows[1].split()[0] == "4-8"
+    assert int(bucket_rows[1].split()[1]) == exact_4_to_8
+
+
+def test_memory_does_not_grow_with_the_frame_count():
+    timer = FrameTimer()
+    for _ in range(20000):
+        timer._add_frame((0.016, 0.002, 0.010, 0.004))
+    assert all(len(steps) == 1 for steps in timer._steps)
+    assert timer.frame_count == 20000
@@ -0,0 +1,130 @@
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import game
+import generation_worker
+
+
+class FakeGenerator:
+    def __init__(self, name):
+        self.name = name
+        self.current_level = 0
+        self.visited = []
+        self.image_bytes = 1000
+
+    def cached_image_bytes(self):
+        return self.image_bytes
+
+    def release_cached_images(self):
+        freed, self.image_bytes = self.image_bytes - 100, 100  # the current level has no file yet
+        return freed
+
+    def parent_level(self):
+        return None
+
+    def to_state(self):
+        return {"name": self.name}
+
+    def goto_level(self, index):
+        self.visited.append(index)
+        self.current_level = index
+
+
+class WorkerHarness:
+    """Runs _worker_main on a thread with plain queues; cancel() arrives while the next job is running."""
+
+    def __init__(self):
+        self.slot = shared_memory.SharedMemory(create=True, size=generation_worker.FRAME_BYTES)
+        self.jobs, self.results, self.control = queue.Queue(), queue.Queue(), queue.Queue()
+        self.thread = threading.Thread(
+            target=generation_worker._worker_main,
+            args=(self.jobs, self.results, self.control, [self.slot.name]),
+            daemon=True,
+        )
+        self.thread.start()
+
+    def run(self, job_id, kind, **params):
+        self.jobs.put({"id": job_id, "kind": kind, "slot": 0, **params})
+        return self.results.get(timeout=10)
+
+    def close(self):
+        self.jobs.put(None)
+        self.thread.join(timeout=10)
+        self.slot.close()
+        self.slot.unlink()
+
+
+def _cancel_current(harness, job_id, token):
+    """Cancel the running job the way the UI does and wait until the listener has reached its token."""
+    harness.control.put(job_id)
+    deadline = time.monotonic() + 5
+    while not token.cancelled and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_cancelled_round_keeps_the_previous_generator(monkeypatch):
+    monkeypatch.setattr(game, "warm_up_prompt", None)
+    monkeypatch.setattr(game, "warm_up_images", None)
+    harness = WorkerHarness()
+    generators = iter([FakeGenerator("shown"), FakeGenerator("never shown")])
+
+    def resolve_round(seed, custom_image, cancel_token=None):
+        generator = next(generators)
+        if generator.name == "never shown":
+            _cancel_current(harness, 2, cancel_token)
+        return {}, None, generator, (1, 2)
+
+    adjusted = []
+
+    def resolve_adjust(generator, easier, custom_image, cancel_token=None):
+        adjusted.append(generator.name)
+        return ("ok", None, (3, 4))
+
+    monkeypatch.setattr(game, "resolve_round", resolve_round)
+    monkeypatch.setattr(game, "resolve_adjust", resolve_adjust)
+    try:
+        assert harness.run(1, "round", seed=1)["status"] == "ok"
+        assert harness.run(2, "round", seed=2)["status"] == "aborted"
+        assert harness.run(3, "adjust", easier=True)["status"] == "ok"
+    finally:
+        harness.close()
+    assert adjusted == ["shown"]
+
+
+def test_adjust_cancelled_after_the_rework_returns_to_the_shown_level(monkeypatch):
+    monkeypatch.setattr(game, "warm_up_prompt", None)
+    monkeypatch.setattr(game, "warm_up_images", None)
+    harness = WorkerHarness()
+    generator = FakeGenerator("shown")
+
+    def resolve_adjust(g, easier, custom_image, cancel_token=None):
+        g.current_level = 1  # the rework was recorded, then detection was cancelled
+        _cancel_current(harness, 2, cancel_token)
+        return ("ok", None, (3, 4))
+
+    monkeypatch.setattr(game, "resolve_round", lambda *args, **kwargs: ({}, None, generator, (1, 2)))
+    monkeypatch.setattr(game, "resolve_adjust", resolve_adjust)
+    try:
+        assert harness.run(1, "round", seed=1)["status"] == "ok"
+        assert harness.run(2, "adjust", easier=False)["status"] == "aborted"
+    finally:
+        harness.close()
+    assert generator.visited == [0]
+    assert generator.current_level == 0
+
+
+def test_results_report_image_bytes_and_release_drops_them(monkeypatch):
+    monkeypatch.setattr(game, "warm_up_prompt", None)
+    monkeypatch.setattr(game, "warm_up_images", None)
+    harness = WorkerHarness()
+    generator = FakeGenerator("shown")
+    monkeypatch.setattr(game, "resolve_round", lambda *args, **kwargs: ({}, None, generator, (1, 2)))
+    try:
+        assert harness.run(1, "round", seed=1)["image_bytes"] == 1000
+        harness.jobs.put({"id": 2, "kind": "release", "slot": None})
+        released = harness.results.get(timeout=10)
+    finally:
+        harness.close()
+    assert (released["status"], released["image_bytes"], released["pixels"]) == ("ok", 100, False)
@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+import pytest
+
+from nano_banana import HedgePolicy, ImageGenerator
+
+
+def _generator(policy):
+    return ImageGenerator(100, 200, hedge_policy=policy)
+
+
+def _attempts(delays, events):
+    """attempt() factory: the n-th launch sleeps delays[n] and returns ("img", n); None means it never finishes."""
+    launched = []
+
+    async def attempt():
+        index = len(launched)
+        launched.append(index)
+        try:
+            await asyncio.sleep(3600 if delays[index] is None else delays[index])
+            return ("img", index)
+        except asyncio.CancelledError:
+            events.append(f"cancelled {index}")
+            raise
+
+    return attempt, launched
+
+
+def test_hedge_wins_and_the_slow_attempt_is_cancelled():
+    policy = HedgePolicy(default_delay=0.05, max_extra_ratio=1.0)
+    events = []
+    attempt, launched = _attempts([None, 0.05], events)
+    started = time.monotonic()
+    image = asyncio.run(_generator(policy)._hedged(attempt))
+    waited = time.monotonic() - started
+
+    assert image == ("img", 1)
+    assert launched == [0, 1]
+    assert events == ["cancelled 0"]
+    assert policy.metrics()["hedges_won"] == 1
+    # Latency is what the caller waited, from the first launch, not just the hedge's own run time.
+    assert policy._latencies[-1] == pytest.approx(waited, abs=0.03)
+    assert policy._latencies[-1] >= 0.1
+
+
+def test_first_attempt_wins_before_the_hedge_delay():
+    policy = HedgePolicy(default_delay=5.0, max_extra_ratio=1.0)
+    attempt, launched = _attempts([0.01], [])
+    assert asyncio.run(_generator(policy)._hedged(attempt)) == ("img", 0)
+    assert launched == [0]
+    assert policy.metrics()["hedges_fired"] == 0
+
+
+def test_original_wins_after_the_hedge_fired_and_the_hedge_is_cancelled():
+    policy = HedgePolicy(default_delay=0.05, max_extra_ratio=1.0)
+    events = []
+    attempt, launched = _attempts([0.1, None], events)
+    assert asyncio.run(_generator(policy)._hedged(attempt)) == ("img", 0)
+    assert launched == [0, 1]
+    assert events == ["cancelled 1"]
+    assert policy.metrics() == {"requests": 1, "hedges_fired": 1, "hedges_won": 0, "hedge_win_rate": 0.0}
+
+
+def test_hedges_are_capped_at_the_extra_ratio():
+    policy = HedgePolicy(default_delay=0.01, max_extra_ratio=0.5)
+    for _ in range(4):
+        attempt, _ = _attempts([0.03, 0.0], [])
+        asyncio.run(_generator(policy)._hedged(attempt))
+    metrics = policy.metrics()
+    assert metrics["requests"] == 4
+    assert metrics["hedges_fired"] == 2
+
+
+def test_hedge_delay_uses_the_latency_percentile():
+    policy = HedgePolicy(percentile=0.9, min_delay=0.5, min_samples=5)
+    assert policy.hedge_delay() == policy.default_delay
+    for latency in (1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0):
+        policy.record(latency, hedge_won=False)
+    assert policy.hedge_delay() == 9.0
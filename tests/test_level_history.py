@@ -0,0 +1,47 @@
+import os
+from types import SimpleNamespace as NS
+
+import game
+import nano_banana
+
+
+class FakeModels:
+    """Async stream stand-in: yields an image unless the next entry of `images` is None."""
+
+    def __init__(self, images):
+        self.images = list(images)
+
+    async def generate_content_stream(self, **kwargs):
+        data = self.images.pop(0)
+
+        async def stream():
+            part = NS(text=None if data else "no image today", inline_data=NS(data=data, mime_type="image/png"))
+            yield NS(candidates=[NS(content=NS(parts=[part]))])
+
+        return stream()
+
+
+def _generator(images):
+    generator = nano_banana.ImageGenerator(100, 200)
+    generator._client = NS(aio=NS(models=FakeModels(images)))
+    return generator
+
+
+def test_rework_without_image_keeps_current_level(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(game.BREAKERS, "image", game.CircuitBreaker("image"))
+    monkeypatch.setattr(game, "try_detect_face", lambda *args, **kwargs: None)
+    generator = _generator([b"level0", None, b"level1"])
+    assert generator.generate_initial() == "ENTER_FILE_NAME_0.png"
+    generator.set_level_target((100, 200))
+
+    assert game.resolve_adjust(generator, easier=False, custom_image=None)[0] == "failed"
+    assert (generator.x_cord, generator.y_cord) == (100, 200)
+    assert generator.current_level == 0
+    assert generator.level_target() == (100, 200)
+    assert generator._current_level_image == "ENTER_FILE_NAME_0.png"
+
+    status, image_path, _ = game.resolve_adjust(generator, easier=True, custom_image=None)
+    assert status == "ok"
+    assert os.path.basename(image_path) == "ENTER_FILE_NAME_1.png"
+    assert generator.parent_level() == 0
@@ -0,0 +1,100 @@
+import game
+from memory_budget import PINNED, MemoryBudget
+
+
+def _budget(limit, entries, evicted):
+    budget = MemoryBudget(limit)
+    for category, key, nbytes, value, evictable in entries:
+        evict = (lambda k=(category, key): evicted.append(k)) if evictable else None
+        budget.track(category, key, nbytes, value, evict=evict)
+    return budget
+
+
+def test_enforce_evicts_lowest_value_then_least_recently_used():
+    evicted = []
+    budget = _budget(
+        1000,
+        [
+            ("pyramid", "p", 300, 4.0, True),
+            ("tiles", "old", 200, 1.0, True),
+            ("overlay", "o", 100, 3.0, True),
+            ("tiles", "new", 200, 1.0, True),
+        ],
+        evicted,
+    )
+    budget.track("tiles", "old", 200, 1.0)  # touch: "new" is now the least recently used tile entry
+    assert evicted == []
+
+    budget.limit_bytes = 350
+    freed = budget.enforce()
+
+    assert evicted == [("tiles", "new"), ("tiles", "old"), ("overlay", "o")]
+    assert freed == 500
+    assert budget.total == 300 and budget.usage() == {"pyramid": 300}
+    assert budget.evictions == 3
+
+
+def test_pinned_and_callback_less_entries_are_never_evicted():
+    evicted = []
+    budget = _budget(
+        100,
+        [
+            ("scene", "current", 400, PINNED, True),
+            ("image_bytes", "generator", 300, 2.0, False),
+            ("overlay", "o", 50, 3.0, True),
+        ],
+        evicted,
+    )
+    assert evicted == [("overlay", "o")]
+    assert budget.total == 700  # still over budget: nothing else may go
+    assert budget.usage() == {"scene": 400, "image_bytes": 300}
+
+
+def test_tracking_an_entry_again_updates_its_size():
+    budget = MemoryBudget(10_000)
+    budget.track("tiles", "viewport", 100, 1.0)
+    budget.track("tiles", "viewport", 40, 1.0)
+    budget.track("overlay", "o", 10, 3.0)
+    assert budget.total == 50
+    budget.release_category("tiles")
+    assert budget.total == 10
+
+
+class FakeWorker:
+    slot_bytes = 2 * 4 * 2**20
+
+    def __init__(self, results):
+        self.results = results
+        self.releases = 0
+
+    def is_alive(self):
+        return True
+
+    def poll(self):
+        results, self.results = self.results, []
+        return results
+
+    def release_images(self):
+        self.releases += 1
+
+
+def test_worker_image_bytes_count_against_the_game_budget():
+    g = game.Game()
+    g.memory.limit_bytes = 12 * 2**20
+    g.worker = FakeWorker([{"id": 7, "kind": "restore", "status": "ok", "image_bytes": 3 * 2**20}])
+    g.memory.track("worker_slots", "shared", g.worker.slot_bytes, game.PINNED)
+    g.poll_worker()
+    assert g.memory.usage()["image_bytes"] == 3 * 2**20
+    assert g.worker.releases == 0
+
+    # The next result pushes the total past the budget: the worker is asked to release its copies.
+    g.worker.results = [{"id": 8, "kind": "adjust", "status": "ok", "image_bytes": 5 * 2**20}]
+    g.poll_worker()
+    assert g.worker.releases == 1
+    assert "image_bytes" not in g.memory.usage()
+
+    # What is left after the release is counted but not evicted again, so no release loop starts.
+    g.worker.results = [{"id": 9, "kind": "release", "status": "ok", "image_bytes": 5 * 2**20}]
+    g.poll_worker()
+    assert g.memory.usage() == {"worker_slots": 8 * 2**20, "image_bytes": 5 * 2**20}
+    assert g.worker.releases == 1
@@ -0,0 +1,54 @@
+from model_router import ModelRouter
+
+
+def _run(router, task, latencies, calls, fail=()):
+    chosen = []
+    for _ in range(calls):
+        model = router.choose(task)
+        chosen.append(model)
+        router.record(task, model, latencies[model], ok=model not in fail)
+    return chosen
+
+
+def test_unhealthy_model_is_probed_again_after_interval():
+    router = ModelRouter({"image": [("fast", 1), ("slow", 1)]}, probe_interval=0.0)
+    model = router.choose("image")
+    assert model == "fast"
+    router.record("image", "fast", 1.0, ok=False)  # one early failure: error rate 1.0
+
+    chosen = _run(router, "image", {"fast": 1.0, "slow": 5.0}, 50)
+
+    assert "fast" in chosen
+    assert router._stats_for("image", "fast").count > 1
+
+
+def test_idle_candidates_wait_for_the_probe_interval():
+    router = ModelRouter({"image": [("fast", 1), ("slow", 1)]}, probe_interval=3600.0)
+    chosen = _run(router, "image", {"fast": 1.0, "slow": 5.0}, 20)
+    assert chosen[:2] == ["fast", "slow"]  # both measured once
+    assert set(chosen[2:]) == {"fast"}
+
+
+def test_best_tier_with_a_healthy_candidate_wins_over_faster_lower_tier():
+    router = ModelRouter({"image": [("good", 1), ("cheap", 3)]}, probe_interval=3600.0)
+    chosen = _run(router, "image", {"good": 5.0, "cheap": 1.0}, 10)
+    assert set(chosen) == {"good"}
+
+
+def test_lower_tier_used_while_better_tier_is_unhealthy():
+    router = ModelRouter({"image": [("good", 1), ("cheap", 3)]}, probe_interval=3600.0)
+    chosen = _run(router, "image", {"good": 5.0, "cheap": 1.0}, 10, fail={"good"})
+    assert chosen[0] == "good"
+    assert set(chosen[1:]) == {"cheap"}
+
+
+def test_describe_last_only_covers_calls_since_reset():
+    router = ModelRouter({"image": [("img", 1)], "prompt": [("txt", 1)]})
+    router.record("prompt", "txt", 0.5, ok=True)
+    router.record("image", "img", 2.0, ok=False)
+    assert router.describe_last() == "image=img(2.0s, failed) prompt=txt(0.5s)"
+
+    router.reset_last()
+    assert router.describe_last() == "no model calls"
+    router.record("image", "img", 1.0, ok=True)
+    assert router.describe_last() == "image=img(1.0s)"
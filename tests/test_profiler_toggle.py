@@ -0,0 +1,29 @@
+import os
+
+import pygame
+
+import game
+
+
+def test_f9_mid_session_runs_frame_and_writes_reports(tmp_path, monkeypatch):
+    monkeypatch.setenv("KALLY_PROFILE_DIR", str(tmp_path))
+    g = game.Game()
+    g.start_worker = lambda: None
+    frames = []
+    draw_menu = g.draw_menu
+
+    def draw_menu_then_quit():
+        frames.append(g.profiler is not None)
+        if len(frames) == 2:
+            pygame.event.post(pygame.event.Event(pygame.QUIT))
+        draw_menu()
+
+    g.draw_menu = draw_menu_then_quit
+    pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_F9))
+    g.run()
+
+    # F9 was handled in the first frame, before its draw; the run must survive the marks that follow.
+    assert frames and all(frames)
+    written = sorted(os.listdir(tmp_path))
+    assert any(name.endswith(".collapsed") for name in written)
+    assert any(name.startswith("kally-frames-") for name in written)
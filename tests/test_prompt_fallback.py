@@ -0,0 +1,26 @@
+import game
+import generate_prompt_json
+
+
+def test_auto_mode_remote_failure_opens_prompt_breaker(monkeypatch):
+    monkeypatch.setenv("PROMPT_MODE", "auto")
+    monkeypatch.setattr(generate_prompt_json, "_openrouter_generate", lambda model, seed: None)
+    breaker = game.CircuitBreaker("prompt", failure_threshold=2, reset_timeout=60.0)
+    monkeypatch.setitem(game.BREAKERS, "prompt", breaker)
+
+    for seed in (1, 2):
+        prompt = game.try_generate_prompt(seed=seed)
+        assert prompt["style"] in generate_prompt_json.STYLES  # local fallback
+
+    assert breaker.state == breaker.OPEN
+
+
+def test_remote_mode_stays_strict_on_failure_and_while_open(monkeypatch):
+    monkeypatch.setenv("PROMPT_MODE", "remote")
+    monkeypatch.setattr(generate_prompt_json, "_openrouter_generate", lambda model, seed: None)
+    breaker = game.CircuitBreaker("prompt", failure_threshold=1, reset_timeout=60.0)
+    monkeypatch.setitem(game.BREAKERS, "prompt", breaker)
+
+    assert game.try_generate_prompt(seed=1) is None
+    assert breaker.state == breaker.OPEN
+    assert game.try_generate_prompt(seed=2) is None
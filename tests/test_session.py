@@ -0,0 +1,91 @@
+import json
+import os
+from types import SimpleNamespace as NS
+
+import nano_banana
+import session
+
+
+class FakeModels:
+    def __init__(self, images):
+        self.images = list(images)
+
+    async def generate_content_stream(self, **kwargs):
+        data = self.images.pop(0)
+
+        async def stream():
+            part = NS(text=None, inline_data=NS(data=data, mime_type="image/png"))
+            yield NS(candidates=[NS(content=NS(parts=[part]))])
+
+        return stream()
+
+
+def test_generator_state_round_trip(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "face.png").write_bytes(b"face")
+    generator = nano_banana.ImageGenerator(100, 200, style="ink", scenery="harbour", custom_image="face.png")
+    generator._client = NS(aio=NS(models=FakeModels([b"level0", b"level1", b"level2"])))
+    generator.generate_initial()
+    generator.set_level_target((101, 202))
+    generator.make_harder(300, 400)
+    generator.goto_level(0)
+    generator.make_easier(500, 600)
+
+    state = json.loads(json.dumps(generator.to_state()))  # must survive the session file
+    restored = nano_banana.ImageGenerator.from_state(state)
+
+    assert restored.to_state() == generator.to_state()
+    assert (restored.x_cord, restored.y_cord) == (500, 600)
+    assert (restored._old_coords_x, restored._old_coords_y) == (100, 200)
+    assert (restored.style, restored.scenery, restored.custom_image) == ("ink", "harbour", "face.png")
+    assert restored.current_level == 2 and restored.parent_level() == 0
+    assert restored.level_target(0) == (101, 202)
+    assert [level.kind for level in restored.levels] == ["initial", "harder", "easier"]
+    assert restored._current_level_image == os.path.abspath("ENTER_FILE_NAME_2.png")
+    # Back works on the restored chain without a model call.
+    assert restored.goto_level(0) == os.path.abspath("ENTER_FILE_NAME_0.png")
+    assert (restored.x_cord, restored.y_cord) == (100, 200)
+
+
+def _write(path, snapshot):
+    path.write_text(json.dumps(snapshot), encoding="utf-8")
+
+
+def test_save_and_load_session(tmp_path):
+    image = tmp_path / "scene.png"
+    image.write_bytes(b"png")
+    path = str(tmp_path / "session.json")
+    round_state = {"image_path": str(image), "target": [1, 2], "seed": 7}
+
+    assert session.save_session(round_state, {"levels": []}, path=path)
+    snapshot = session.load_session(path)
+
+    assert snapshot["round"] == round_state
+    assert snapshot["generator"] == {"levels": []}
+    assert not os.path.exists(path + ".tmp")
+
+
+def test_load_session_rejects_unusable_snapshots(tmp_path):
+    image = tmp_path / "scene.png"
+    image.write_bytes(b"png")
+    path = tmp_path / "session.json"
+    valid = {"version": session.SESSION_VERSION, "round": {"image_path": str(image)}, "generator": None}
+
+    assert session.load_session(str(tmp_path / "missing.json")) is None
+    path.write_text("{torn", encoding="utf-8")
+    assert session.load_session(str(path)) is None
+    _write(path, dict(valid, version=session.SESSION_VERSION + 1))
+    assert session.load_session(str(path)) is None
+    _write(path, dict(valid, round={"image_path": str(tmp_path / "deleted.png")}))
+    assert session.load_session(str(path)) is None
+    _write(path, dict(valid, round={}))
+    assert session.load_session(str(path)) is None
+    _write(path, valid)
+    assert session.load_session(str(path)) is not None
+
+
+def test_empty_session_file_setting_disables_sessions(monkeypatch):
+    monkeypatch.setenv("KALLY_SESSION_FILE", "")
+    assert session.session_path() is None
+    assert session.save_session({"image_path": "x"}, None) is False
+    assert session.load_session() is None
@@ -0,0 +1,55 @@
+import pytest
+
+from nano_banana import ImageGenerator
+
+
+def _box(x0, y0, x1, y1):
+    return f'{{"face_box": {{"x0": {x0}, "y0": {y0}, "x1": {x1}, "y1": {y1}}}}}'
+
+
+def test_center_of_a_plausible_box():
+    assert ImageGenerator._parse_target_box(_box(100, 200, 130, 236)) == (115, 218)
+
+
+def test_box_in_surrounding_text_and_fenced_json():
+    text = "Here is the scene.\n```json\n" + _box(0, 0, 6, 6) + "\n```"
+    assert ImageGenerator._parse_target_box(text) == (3, 3)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "no box here",
+        '{"center": {"x": 1, "y": 2}}',
+        '{"face_box": {"x0": 1, "y0": 2, "x1": 30}}',
+        '{"face_box": {"x0": "left", "y0": 2, "x1": 30, "y1": 40}}',
+        '{"face_box": null}',
+        "{not json}",
+    ],
+)
+def test_missing_or_malformed_box(text):
+    assert ImageGenerator._parse_target_box(text) is None
+
+
+@pytest.mark.parametrize(
+    "box",
+    [
+        (-1, 200, 30, 236),  # off the left edge
+        (100, -5, 130, 30),  # off the top edge
+        (750, 200, 769, 236),  # past the right edge
+        (100, 1320, 130, 1345),  # past the bottom edge
+        (100, 200, 105, 236),  # too narrow to be a face
+        (100, 200, 130, 205),  # too flat
+        (0, 0, 400, 300),  # wider than half the canvas
+        (0, 0, 300, 700),  # taller than half the canvas
+        (130, 236, 100, 200),  # inverted corners
+    ],
+)
+def test_implausible_boxes_are_rejected(box):
+    assert ImageGenerator._parse_target_box(_box(*box)) is None
+
+
+def test_boundary_sizes_are_accepted():
+    assert ImageGenerator._parse_target_box(_box(0, 0, 384, 672)) == (192, 336)
+    assert ImageGenerator._parse_target_box(_box(762, 1338, 768, 1344)) == (765, 1341)
@@ -0,0 +1,212 @@
+"""
+Zoom/pan viewport for showing the 768x1344 scene in a smaller window.
+
+MipPyramid holds the scene at 1, 1/2, 1/4, ... scale cut into TILE x TILE tiles. It is built once per scene on a
+background thread (see PyramidBuilder). Viewport picks the smallest mip level that still has at least one source
+pixel per screen pixel and blits only the tiles that intersect the window. While zoom is settled, scaled tiles
+are smoothscaled once and cached; during a zoom animation they are drawn with the cheap nearest-neighbour scale.
+
+Coordinates: "base" is the scene canvas (BASE_W x BASE_H), "screen" is the window. screen_to_base() maps a
+click back into base coordinates for hit testing.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import pygame
+
+TILE = 256
+MAX_ZOOM = 4.0
+ZOOM_SMOOTHING = 12.0  # per second; higher reaches the target zoom faster
+SCALED_TILE_CACHE = 192  # scaled tiles kept for the settled zoom level(s)
+SMOOTH_TILES_PER_FRAME = 6  # cap on smoothscale work per frame; the rest use the nearest-neighbour scale
+
+
+class MipPyramid:
+    def __init__(self, surface: pygame.Surface, min_scale: float = 0.125):
+        self.size = surface.get_size()
+        self.levels = [surface]
+        scale = 1.0
+        while scale / 2 >= min_scale:
+            prev = self.levels[-1]
+            w, h = max(1, prev.get_width() // 2), max(1, prev.get_height() // 2)
+            if prev.get_bitsize() in (24, 32):
+                self.levels.append(pygame.transform.smoothscale(prev, (w, h)))
+            else:
+                self.levels.append(pygame.transform.scale(prev, (w, h)))
+            scale /= 2
+        self.tiles = {}
+        for index, level in enumerate(self.levels):
+            lw, lh = level.get_size()
+            for ty in range(0, lh, TILE):
+                for tx in range(0, lw, TILE):
+                    rect = pygame.Rect(tx, ty, min(TILE, lw - tx), min(TILE, lh - ty))
+                    self.tiles[(index, tx // TILE, ty // TILE)] = level.subsurface(rect)
+
+    @staticmethod
+    def scale_of(level: int) -> float:
+        return 0.5 ** level
+
+    def level_for(self, zoom: float) -> int:
+        level = 0
+        while level + 1 < len(self.levels) and self.scale_of(level + 1) >= zoom:
+            level += 1
+        return level
+
+    def nbytes(self) -> int:
+        # Level 0 is the scene surface itself, owned elsewhere.
+        return sum(_nbytes(s) for s in self.levels[1:])
+
+
+class PyramidBuilder:
+    """Builds a MipPyramid on a daemon thread; poll .pyramid (None until ready)."""
+
+    def __init__(self, surface: pygame.Surface):
+        self.pyramid: Optional[MipPyramid] = None
+        self._thread = threading.Thread(target=self._build, args=(surface,), name="mip-pyramid", daemon=True)
+        self._thread.start()
+
+    def _build(self, surface: pygame.Surface):
+        self.pyramid = MipPyramid(surface)
+
+
+class Viewport:
+    def __init__(self, view_size: Tuple[int, int], scene_size: Tuple[int, int]):
+        self.view_w, self.view_h = view_size
+        self.scene_w, self.scene_h = scene_size
+        self.fit_zoom = min(self.view_w / self.scene_w, self.view_h / self.scene_h)
+        self.zoom = self.target_zoom = self.fit_zoom
+        self.cx, self.cy = self.scene_w / 2, self.scene_h / 2
+        self._anchor: Optional[Tuple[float, float, float, float]] = None  # screen x/y and base x/y kept fixed
+        self._scaled = OrderedDict()
+        self.cache_bytes = 0  # bytes held by _scaled, kept incrementally for memory accounting
+
+    # --- coordinate mapping -------------------------------------------------------------------------------
+
+    def screen_to_base(self, pos) -> Optional[Tuple[int, int]]:
+        """Base coordinates under a screen position, or None if it falls outside the scene."""
+        x = self.cx + (pos[0] - self.view_w / 2) / self.zoom
+        y = self.cy + (pos[1] - self.view_h / 2) / self.zoom
+        if not (0 <= x < self.scene_w and 0 <= y < self.scene_h):
+            return None
+        return int(x), int(y)
+
+    def base_to_screen(self, pt) -> Tuple[int, int]:
+        return (
+            round((pt[0] - self.cx) * self.zoom + self.view_w / 2),
+            round((pt[1] - self.cy) * self.zoom + self.view_h / 2),
+        )
+
+    def scale_length(self, length: float) -> int:
+        return max(1, round(length * self.zoom))
+
+    # --- navigation ---------------------------------------------------------------------------------------
+
+    def reset(self):
+        self.target_zoom = self.fit_zoom
+        self._anchor = None
+        self.cx, self.cy = self.scene_w / 2, self.scene_h / 2
+
+    def zoom_at(self, screen_pos, factor: float):
+        """Zoom by factor towards screen_pos; the scene point under it stays put while the zoom animates."""
+        base = self.screen_to_base(screen_pos)
+        self.target_zoom = max(self.fit_zoom, min(MAX_ZOOM, self.target_zoom * factor))
+        if base is None:
+            self._anchor = None
+        else:
+            self._anchor = (screen_pos[0], screen_pos[1], base[0], base[1])
+
+    def pan(self, dx: float, dy: float):
+        """Move the view by a screen-pixel delta (drag direction)."""
+        self.cx -= dx / self.zoom
+        self.cy -= dy / self.zoom
+        self._clamp()
+
+    def update(self, dt: float):
+        if self.zoom == self.target_zoom:
+            return
+        step = min(1.0, dt * ZOOM_SMOOTHING)
+        self.zoom += (self.target_zoom - self.zoom) * step
+        if abs(self.zoom - self.target_zoom) < 1e-3 * self.target_zoom:
+            self.zoom = self.target_zoom
+        if self._anchor is not None:
+            sx, sy, bx, by = self._anchor
+            self.cx = bx - (sx - self.view_w / 2) / self.zoom
+            self.cy = by - (sy - self.view_h / 2) / self.zoom
+        self._clamp()
+
+    @property
+    def settled(self) -> bool:
+        return self.zoom == self.target_zoom
+
+    def _clamp(self):
+        half_w, half_h = self.view_w / 2 / self.zoom, self.view_h / 2 / self.zoom
+        # Centre the scene on an axis where it is smaller than the window; otherwise keep the view inside it.
+        self.cx = self.scene_w / 2 if half_w * 2 >= self.scene_w else min(max(self.cx, half_w), self.scene_w - half_w)
+        self.cy = self.scene_h / 2 if half_h * 2 >= self.scene_h else min(max(self.cy, half_h), self.scene_h - half_h)
+
+    # --- drawing ------------------------------------------------------------------------------------------
+
+    def draw(self, screen: pygame.Surface, pyramid: Optional[MipPyramid], scene: pygame.Surface):
+        if pyramid is None:
+            self._draw_unbuilt(screen, scene)
+            return
+        level = pyramid.level_for(self.zoom)
+        scale = pyramid.scale_of(level)
+        ratio = self.zoom / scale  # screen pixels per level pixel
+        # Visible region in level pixels
+        left = (self.cx - self.view_w / 2 / self.zoom) * scale
+        top = (self.cy - self.view_h / 2 / self.zoom) * scale
+        right = left + self.view_w / ratio
+        bottom = top + self.view_h / ratio
+        lw, lh = pyramid.levels[level].get_size()
+        budget = SMOOTH_TILES_PER_FRAME if self.settled else 0
+        zoom_key = round(self.zoom, 5)
+        for ty in range(max(0, int(top // TILE)), min((lh - 1) // TILE, int(bottom // TILE)) + 1):
+            for tx in range(max(0, int(left // TILE)), min((lw - 1) // TILE, int(right // TILE)) + 1):
+                tile = pyramid.tiles[(level, tx, ty)]
+                tw, th = tile.get_size()
+                sx0 = round((tx * TILE - left) * ratio)
+                sy0 = round((ty * TILE - top) * ratio)
+                size = (round((tx * TILE + tw - left) * ratio) - sx0, round((ty * TILE + th - top) * ratio) - sy0)
+                if size == (tw, th):
+                    screen.blit(tile, (sx0, sy0))
+                    continue
+                key = (zoom_key, level, tx, ty)
+                scaled = self._scaled.get(key)
+                if scaled is not None and scaled.get_size() == size:
+                    self._scaled.move_to_end(key)
+                elif budget > 0 and tile.get_bitsize() in (24, 32):
+                    budget -= 1
+                    scaled = pygame.transform.smoothscale(tile, size)
+                    if key in self._scaled:
+                        self.cache_bytes -= _nbytes(self._scaled[key])
+                    self._scaled[key] = scaled
+                    self.cache_bytes += _nbytes(scaled)
+                    if len(self._scaled) > SCALED_TILE_CACHE:
+                        self.cache_bytes -= _nbytes(self._scaled.popitem(last=False)[1])
+                else:
+                    scaled = pygame.transform.scale(tile, size)
+                screen.blit(scaled, (sx0, sy0))
+
+    def _draw_unbuilt(self, screen: pygame.Surface, scene: pygame.Surface):
+        # Until the pyramid is ready (a few frames at most), scale just the visible part of the full scene.
+        left = max(0, int(self.cx - self.view_w / 2 / self.zoom))
+        top = max(0, int(self.cy - self.view_h / 2 / self.zoom))
+        right = min(self.scene_w, int(self.cx + self.view_w / 2 / self.zoom) + 1)
+        bottom = min(self.scene_h, int(self.cy + self.view_h / 2 / self.zoom) + 1)
+        if right <= left or bottom <= top:
+            return
+        src = scene.subsurface(pygame.Rect(left, top, right - left, bottom - top))
+        dest = self.base_to_screen((left, top))
+        size = (round((right - left) * self.zoom), round((bottom - top) * self.zoom))
+        screen.blit(pygame.transform.scale(src, size), dest)
+
+    def clear_cache(self):
+        self._scaled.clear()
+        self.cache_bytes = 0
+
+
+def _nbytes(surface: pygame.Surface) -> int:
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()